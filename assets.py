@@ -0,0 +1,137 @@
+# GOOSE EAT GOOSE - image loading
+# Loads every image the game draws once, converts it to the display's pixel
+# format (so blits don't have to convert each pixel every frame) and packs
+# the small sprites into one atlas surface.
+
+import time, pygame
+from concurrent.futures import ThreadPoolExecutor
+
+ATLASWIDTH = 256 # width of the atlas surface, in pixels (it is as tall as it needs to be)
+LOADTHREADS = 4  # how many image files startLoading() reads at once
+
+class Assets:
+    # load() an image under a name, pack() the small ones into the atlas,
+    # then get() them by name. After pack() the packed images are
+    # subsurfaces of the atlas, which blit like any other surface.
+    #
+    # Images are converted as they are loaded if the display has been set
+    # up, and kept as they are otherwise (as when a World is run headless).
+    #
+    # startLoading() reads and decodes several files at once on other
+    # threads, which can go on while the window is being opened;
+    # finishLoading() then waits for them and converts them like load().
+
+    def __init__(self):
+        self.images = {}          # name -> Surface
+        self.atlas = None
+        self.atlasRects = {}      # name -> Rect of the image in the atlas
+        self.loadSeconds = {}     # name -> how long loading and converting the image took
+        self.converted = 0        # how many images were converted to the display format
+        self.packSeconds = 0.0
+        self.loading = {}         # name -> Future of an image from startLoading()
+
+
+    def load(self, name, filename):
+        startTime = time.perf_counter()
+        return self.convert(name, pygame.image.load(filename), startTime)
+
+
+    def startLoading(self, filenames):
+        # filenames is a dict of name -> filename
+        executor = ThreadPoolExecutor(max(1, min(LOADTHREADS, len(filenames))), thread_name_prefix='assets')
+        for name, filename in filenames.items():
+            self.loading[name] = executor.submit(readImage, filename)
+        executor.shutdown(wait=False) # the threads finish what was submitted, then stop
+
+
+    def getLoaded(self, name):
+        # wait for one image from startLoading() without converting it (for
+        # the window icon, which is needed before the window is open)
+        return self.loading[name].result()[0]
+
+
+    def finishLoading(self):
+        # Wait for the images from startLoading() and convert them. Raises
+        # the error from any that couldn't be loaded.
+        for name, future in self.loading.items():
+            image, loadSeconds = future.result()
+            startTime = time.perf_counter()
+            self.convert(name, image, startTime)
+            self.loadSeconds[name] += loadSeconds
+        self.loading = {}
+
+
+    def convert(self, name, image, startTime):
+        if pygame.display.get_surface() is not None:
+            # images with transparency (per-pixel alpha or a colorkey) keep it
+            if image.get_flags() & pygame.SRCALPHA or image.get_colorkey() is not None:
+                image = image.convert_alpha()
+            else:
+                image = image.convert()
+            self.converted += 1
+        self.images[name] = image
+        self.loadSeconds[name] = time.perf_counter() - startTime
+        return image
+
+
+    def add(self, name, image):
+        # keep an image made some other way (like a flipped copy of a loaded one)
+        self.images[name] = image
+        return image
+
+
+    def get(self, name):
+        return self.images[name]
+
+
+    def pack(self, names):
+        # Copy the named images into one atlas, in rows (shelves) from the
+        # tallest image down, and replace them with subsurfaces of it.
+        startTime = time.perf_counter()
+        names = sorted(names, key=lambda name: (-self.images[name].get_height(), name))
+        rects = {}
+        x = y = shelfHeight = 0
+        for name in names:
+            width, height = self.images[name].get_size()
+            if x + width > ATLASWIDTH and x > 0:
+                # start a new shelf under this one
+                y += shelfHeight
+                x = shelfHeight = 0
+            rects[name] = pygame.Rect(x, y, width, height)
+            x += width
+            shelfHeight = max(shelfHeight, height)
+
+        atlas = pygame.Surface((max(ATLASWIDTH, max(rect.right for rect in rects.values())), y + shelfHeight), pygame.SRCALPHA)
+        if pygame.display.get_surface() is not None:
+            atlas = atlas.convert_alpha()
+        atlas.fill((0, 0, 0, 0))
+        for name, rect in rects.items():
+            # on a clear atlas, taking the larger of each channel copies the pixels exactly
+            atlas.blit(self.images[name], rect, special_flags=pygame.BLEND_RGBA_MAX)
+            self.images[name] = atlas.subsurface(rect)
+        self.atlas = atlas
+        self.atlasRects.update(rects)
+        self.packSeconds = time.perf_counter() - startTime
+        return atlas
+
+
+    def stats(self):
+        # Returns how long loading took and how full the atlas is, as a dict.
+        atlasArea = self.atlas.get_width() * self.atlas.get_height() if self.atlas else 0
+        packedArea = sum(rect.width * rect.height for rect in self.atlasRects.values())
+        return {'images': len(self.images),
+                'converted': self.converted,
+                'loadSeconds': round(sum(self.loadSeconds.values()), 6),
+                'slowestLoad': max(self.loadSeconds, key=self.loadSeconds.get) if self.loadSeconds else None,
+                'packSeconds': round(self.packSeconds, 6),
+                'atlasSize': self.atlas.get_size() if self.atlas else None,
+                'atlasImages': len(self.atlasRects),
+                'atlasFill': packedArea / atlasArea if atlasArea else 0.0}
+
+
+def readImage(filename):
+    # load an image file on one of startLoading()'s threads: returns the
+    # image and how long loading it took
+    startTime = time.perf_counter()
+    image = pygame.image.load(filename)
+    return image, time.perf_counter() - startTime
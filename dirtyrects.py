@@ -0,0 +1,62 @@
+# GOOSE EAT GOOSE - dirty rectangle tracking
+# Lets the renderer send only the parts of the screen that changed since the
+# last frame to pygame.display.update() instead of the whole window.
+
+import pygame
+
+class DirtyRects:
+    # Each frame, call beginFrame(), then add() the screen rect of
+    # everything drawn on top of the background (sprites, the health meter
+    # and any text), then update() instead of pygame.display.update().
+    #
+    # Something that is drawn in the same place with the same image as last
+    # frame hasn't changed, so only the rects that were added last frame or
+    # this frame but not both are updated: that covers both where a sprite
+    # was and where it is now. When the camera scrolls everything moves, so
+    # the whole screen is updated, as it is when more than maxRects rects
+    # changed (lots of small updates cost more than one big one).
+
+    def __init__(self, maxRects=150):
+        self.maxRects = maxRects
+        self.camera = None     # the camera position last frame
+        self.previous = None   # the rects added last frame
+        self.current = set()   # the rects added this frame
+        self.fullUpdate = True # if the whole screen will be updated this frame
+        self.fullUpdates = 0   # how many frames updated the whole screen
+        self.partialUpdates = 0 # how many frames only updated the changed rects
+
+
+    def beginFrame(self, camerax, cameray):
+        self.fullUpdate = self.previous is None or self.camera != (camerax, cameray)
+        self.camera = (camerax, cameray)
+        self.current = set()
+
+
+    def add(self, rect, what):
+        # Record that what (a Surface, or anything else that tells this
+        # drawing apart from a different one in the same place) was drawn
+        # at rect on the screen.
+        if rect.width and rect.height:
+            self.current.add((rect.x, rect.y, rect.width, rect.height, what))
+
+
+    def invalidate(self):
+        # make the next frame update the whole screen
+        self.previous = None
+
+
+    def update(self):
+        # Send this frame's changes to the display.
+        changed = None
+        if not self.fullUpdate:
+            changed = self.previous ^ self.current
+            if len(changed) > self.maxRects:
+                changed = None
+        if changed is None:
+            pygame.display.update()
+            self.fullUpdates += 1
+        else:
+            if changed:
+                pygame.display.update([entry[:4] for entry in changed])
+            self.partialUpdates += 1
+        self.previous = self.current
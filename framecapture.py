@@ -0,0 +1,137 @@
+# GOOSE EAT GOOSE - recording frames to disk
+# Run the game with "--capture DIR" to save every frame it shows into DIR,
+# as PNG files (the default), BMP files ("--capture-format bmp", bigger but
+# quicker to write) or one raw video file ("--capture-format raw").
+#
+# Encoding and writing a frame takes much longer than drawing one, so the
+# game loop only copies each frame into one of a ring of surfaces made up
+# front (a quick blit) and a background thread does the rest. When the
+# thread falls behind and every surface in the ring is waiting to be
+# written, the frame is dropped rather than making the game wait; the
+# frame files are numbered by frame, so the gaps show where that happened.
+#
+# The raw file is just the frames one after another, 3 bytes (RGB) per
+# pixel, which ffmpeg can read with
+#   ffmpeg -f rawvideo -pix_fmt rgb24 -s 640x480 -r 60 -i capture.rgb capture.mp4
+# (the size is the window's, and -r is however many frames a second the
+# game drew). A dropped frame leaves no gap in the raw file, so the video
+# just skips ahead there; capture.frames beside it has the number of each
+# frame in capture.rgb, one per line, so the numbers that are missing are
+# the frames that were dropped.
+
+import os, time, queue, threading
+import pygame
+from frameprofiler import RollingHistogram
+
+CAPTURERING = 16 # how many frames can wait to be written before frames are dropped
+CAPTUREFORMATS = ('png', 'bmp', 'raw')
+CAPTURESTATSFRAMES = 600 # how many frames the encode time percentiles cover
+RAWFILENAME = 'capture.rgb'
+RAWFRAMESFILENAME = 'capture.frames' # the frame numbers of the frames in RAWFILENAME
+
+class FrameCapture:
+    # capture() each frame as it is shown and close() at the end, which
+    # waits for the frames still in the ring to be written. surface is the
+    # display surface (or one like it) that the ring's surfaces are made to
+    # match, so copying a frame is a straight copy with no conversion.
+
+    def __init__(self, directory, surface, captureFormat='png', ringFrames=CAPTURERING):
+        if captureFormat not in CAPTUREFORMATS:
+            raise ValueError('unknown capture format %r (the formats are %s)' % (captureFormat, ', '.join(CAPTUREFORMATS)))
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.captureFormat = captureFormat
+        self.rawFile = self.rawFramesFile = None
+        if captureFormat == 'raw':
+            self.rawFile = open(os.path.join(directory, RAWFILENAME), 'wb')
+            self.rawFramesFile = open(os.path.join(directory, RAWFRAMESFILENAME), 'w')
+        self.ring = [pygame.Surface(surface.get_size(), 0, surface) for i in range(ringFrames)]
+        self.free = queue.SimpleQueue()    # index numbers of the ring surfaces that can be copied into
+        for i in range(ringFrames):
+            self.free.put(i)
+        self.waiting = queue.SimpleQueue() # (ring index, frame number, when it was copied) to write, or None to stop
+        self.perf = time.perf_counter_ns
+
+        self.frames = 0   # how many frames capture() has been given
+        self.dropped = 0  # how many of them there was no room for
+        self.written = 0  # how many have been written to disk
+        self.error = None # the exception that stopped the writer thread, if one did
+        # (only the writer thread adds to these)
+        self.encodeTimes = RollingHistogram(CAPTURESTATSFRAMES)  # nanoseconds encoding and writing each frame
+        self.frameLatency = RollingHistogram(CAPTURESTATSFRAMES) # nanoseconds from each frame being copied to it being written
+
+        self.writer = threading.Thread(target=self.writeFrames, name='frame capture', daemon=True)
+        self.writer.start()
+
+
+    def capture(self, surface):
+        # Copy the frame on surface into the ring, or drop it if the ring is
+        # full. Returns whether it was kept.
+        frameNumber = self.frames
+        self.frames += 1
+        try:
+            i = self.free.get_nowait()
+        except queue.Empty:
+            self.dropped += 1
+            return False
+        self.ring[i].blit(surface, (0, 0))
+        self.waiting.put((i, frameNumber, self.perf()))
+        return True
+
+
+    def writeFrames(self):
+        # the writer thread: writes each frame that is waiting and puts its
+        # surface back in the ring, until it is sent None
+        perf = self.perf
+        while True:
+            item = self.waiting.get()
+            if item is None:
+                break
+            i, frameNumber, copyTime = item
+            start = perf()
+            if self.error is None:
+                try:
+                    self.writeFrame(self.ring[i], frameNumber)
+                    self.written += 1
+                except Exception as error:
+                    # stop writing (the frames that come after are dropped
+                    # as they wait) and let close() raise it
+                    self.error = error
+            end = perf()
+            self.encodeTimes.add(end - start)
+            self.frameLatency.add(end - copyTime)
+            self.free.put(i)
+
+
+    def writeFrame(self, frameSurf, frameNumber):
+        if self.rawFile is not None:
+            self.rawFile.write(pygame.image.tobytes(frameSurf, 'RGB'))
+            self.rawFramesFile.write('%d\n' % frameNumber)
+        else:
+            pygame.image.save(frameSurf, os.path.join(self.directory, 'frame%06d.%s' % (frameNumber, self.captureFormat)))
+
+
+    def close(self):
+        # Wait for the frames in the ring to be written. Raises the error
+        # that stopped the writer, if anything did.
+        if self.writer.is_alive():
+            self.waiting.put(None)
+            self.writer.join()
+        if self.rawFile is not None:
+            self.rawFile.close()
+            self.rawFramesFile.close()
+        if self.error is not None:
+            raise self.error
+
+
+    def stats(self):
+        # How many frames were captured, dropped and written, and how long
+        # the recent ones took to write, in milliseconds, as a dict.
+        return {'frames': self.frames,
+                'dropped': self.dropped,
+                'written': self.written,
+                'encodeMs': {'mean': round(self.encodeTimes.getMean() / 1e6, 3),
+                             'p50': round(self.encodeTimes.getPercentile(50) / 1e6, 3),
+                             'p95': round(self.encodeTimes.getPercentile(95) / 1e6, 3)},
+                'latencyMs': {'p50': round(self.frameLatency.getPercentile(50) / 1e6, 3),
+                              'p95': round(self.frameLatency.getPercentile(95) / 1e6, 3)}}
@@ -0,0 +1,218 @@
+# GOOSE EAT GOOSE - per-phase frame profiler
+# Times each phase of each frame (moving the geese, loading chunks, the
+# camera, drawing each layer, event handling, collisions, updating the
+# display...) and keeps the last few seconds of frames so that a slow frame
+# can be pinned on a phase. Press F3 in the game to show the numbers.
+#
+# It is meant to stay in the game all the time: while it is switched off,
+# mark() is a function that does nothing.
+#
+# StartupTimer breaks the time from starting the game to showing the
+# first frame down the same way ("--startup-report" prints it).
+
+import time, collections
+import numpy, pygame
+
+HISTORYFRAMES = 120   # how many frames each phase's history holds
+OVERLAYREFRESH = 15   # redraw the overlay text every this many frames
+OVERLAYCOLOR = (255, 255, 255)
+OVERLAYBACKGROUND = (0, 0, 0)
+
+def ignoreMark(phase):
+    # what mark() is while the profiler is switched off
+    pass
+
+
+class RollingHistogram:
+    # The last size samples (in nanoseconds), in a ring buffer.
+
+    def __init__(self, size=HISTORYFRAMES):
+        self.samples = numpy.zeros(size, dtype=numpy.int64)
+        self.next = 0   # where the next sample goes
+        self.count = 0  # how many samples there are (up to size)
+
+
+    def add(self, sample):
+        self.samples[self.next] = sample
+        self.next = (self.next + 1) % len(self.samples)
+        if self.count < len(self.samples):
+            self.count += 1
+
+
+    def getSamples(self):
+        return self.samples[:self.count]
+
+
+    def getPercentile(self, percentile):
+        if not self.count:
+            return 0
+        return float(numpy.percentile(self.getSamples(), percentile))
+
+
+    def getMean(self):
+        if not self.count:
+            return 0
+        return float(self.getSamples().mean())
+
+
+    def getBuckets(self):
+        # How many samples took under 1 microsecond, 1-2, 2-4, 4-8... (as
+        # a list of counts, one per power of two microseconds).
+        if not self.count:
+            return []
+        micros = self.getSamples() // 1000
+        buckets = numpy.zeros(len(micros), dtype=numpy.int64)
+        nonZero = micros > 0
+        buckets[nonZero] = numpy.log2(micros[nonZero]).astype(numpy.int64) + 1
+        return numpy.bincount(buckets).tolist()
+
+
+class FrameProfiler:
+    # Call beginFrame() at the start of each frame, mark(phase) as each
+    # phase finishes (the time since the previous mark is added to that
+    # phase) and endFrame() at the end. A phase can be marked more than
+    # once a frame (the World is stepped more than once in some frames);
+    # its times are added up.
+
+    def __init__(self, enabled=False, historyFrames=HISTORYFRAMES):
+        self.perf = time.perf_counter_ns
+        self.historyFrames = historyFrames
+        self.histories = collections.OrderedDict() # phase -> RollingHistogram of its time per frame
+        self.frameHistory = RollingHistogram(historyFrames) # the whole frame
+        self.current = {}       # phase -> nanoseconds so far this frame
+        self.frameStart = 0
+        self.last = 0           # time of the last mark
+        self.frames = 0
+        self.overlaySurf = None
+        self.enabled = False
+        self.mark = ignoreMark
+        if enabled:
+            self.enable()
+
+
+    def enable(self):
+        self.enabled = True
+        self.mark = self.recordMark
+        self.last = self.frameStart = self.perf()
+
+
+    def disable(self):
+        self.enabled = False
+        self.mark = ignoreMark
+        self.current.clear()
+
+
+    def toggle(self):
+        if self.enabled:
+            self.disable()
+        else:
+            self.enable()
+
+
+    def beginFrame(self):
+        if self.enabled:
+            self.current.clear()
+            self.last = self.frameStart = self.perf()
+
+
+    def recordMark(self, phase):
+        now = self.perf()
+        self.current[phase] = self.current.get(phase, 0) + now - self.last
+        self.last = now
+
+
+    def endFrame(self):
+        if not self.enabled:
+            return
+        histories = self.histories
+        for phase, phaseTime in self.current.items():
+            if phase not in histories:
+                histories[phase] = RollingHistogram(self.historyFrames)
+        for phase, history in histories.items():
+            history.add(self.current.get(phase, 0)) # a phase that didn't run this frame took no time
+        self.frameHistory.add(self.perf() - self.frameStart)
+        self.frames += 1
+
+
+    def report(self):
+        # The recent frames as a dict of phase -> percentiles and histogram
+        # buckets, in milliseconds.
+        report = collections.OrderedDict()
+        for phase, history in list(self.histories.items()) + [('frame', self.frameHistory)]:
+            report[phase] = {'mean': round(history.getMean() / 1e6, 4),
+                             'p50': round(history.getPercentile(50) / 1e6, 4),
+                             'p95': round(history.getPercentile(95) / 1e6, 4),
+                             'p99': round(history.getPercentile(99) / 1e6, 4),
+                             'buckets': history.getBuckets()}
+        return report
+
+
+    def drawOverlay(self, surface, font, topleft):
+        # Draw a little table of the mean and 95th percentile milliseconds
+        # of each phase. The text is only rendered again every
+        # OVERLAYREFRESH frames. Returns the area drawn on.
+        if self.overlaySurf is None or self.frames % OVERLAYREFRESH == 0:
+            rows = [('phase', 'mean', 'p95')]
+            for phase, history in list(self.histories.items()) + [('frame', self.frameHistory)]:
+                rows.append((phase, '%.2f' % (history.getMean() / 1e6), '%.2f' % (history.getPercentile(95) / 1e6)))
+            # render each column separately so the numbers line up
+            cells = [[font.render(cell, True, OVERLAYCOLOR) for cell in row] for row in rows]
+            columnWidths = [max(row[column].get_width() for row in cells) + 8 for column in range(3)]
+            lineHeight = font.get_linesize()
+            self.overlaySurf = pygame.Surface((sum(columnWidths) + 4, lineHeight * len(rows) + 4))
+            self.overlaySurf.fill(OVERLAYBACKGROUND)
+            self.overlaySurf.set_alpha(200)
+            for i, row in enumerate(cells):
+                right = 2
+                for column, cellSurf in enumerate(row):
+                    right += columnWidths[column]
+                    if column == 0:
+                        x = 4 # names on the left, numbers on the right
+                    else:
+                        x = right - cellSurf.get_width() - 4
+                    self.overlaySurf.blit(cellSurf, (x, 2 + i * lineHeight))
+        return surface.blit(self.overlaySurf, topleft)
+
+
+class StartupTimer:
+    # Times each step of starting the game up to the first frame being
+    # shown. mark(step) as each step finishes, like FrameProfiler.mark();
+    # start is the perf_counter_ns() time the first step started at. Once
+    # finish() has been called, marks (from later games) are ignored.
+
+    def __init__(self, start=None):
+        self.perf = time.perf_counter_ns
+        self.start = self.last = start if start is not None else self.perf()
+        self.steps = collections.OrderedDict() # step -> nanoseconds
+        self.finished = False
+
+
+    def mark(self, step):
+        if self.finished:
+            return
+        now = self.perf()
+        self.steps[step] = self.steps.get(step, 0) + now - self.last
+        self.last = now
+
+
+    def finish(self, step):
+        # mark the last step (showing the first frame) and stop timing
+        self.mark(step)
+        self.finished = True
+
+
+    def report(self):
+        # milliseconds for each step and in total, as a dict
+        return {'steps': collections.OrderedDict((step, round(stepTime / 1e6, 3)) for step, stepTime in self.steps.items()),
+                'total': round((self.last - self.start) / 1e6, 3)}
+
+
+    def getText(self):
+        # the report as a little table, one step per line
+        total = max(1, self.last - self.start)
+        lines = ['%-14s %8.1f ms %5.1f%%' % (step, stepTime / 1e6, 100 * stepTime / total) for step, stepTime in self.steps.items()]
+        lines.append('%-14s %8.1f ms' % ('first frame at', total / 1e6))
+        return '\n'.join(lines)
+
+
+NOPROFILER = FrameProfiler() # switched off, for when nothing is profiling a World
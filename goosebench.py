@@ -0,0 +1,218 @@
+# GOOSE EAT GOOSE - headless frame time benchmark
+# Plays the game without a real window (SDL's dummy video driver) with a
+# fixed seed and scripted key presses, for a range of population sizes, and
+# prints the frame times as JSON so that two builds can be compared.
+#
+# Usage: python goosebench.py [--ticks 300] [--geese 27,100,1000,10000]
+#                             [--variants goose,squirrel,...] [--output FILE]
+#
+# Every variant in profiles.py is measured (they all run on the same
+# engine). For each variant and population the report has the total and
+# per-phase frame time percentiles (p50/p95/p99, in milliseconds), ticks per
+# second and peak memory. The phases are event handling, World.step(),
+# drawing and pygame.display.update(), with a finer breakdown from the
+# game's FrameProfiler under 'profilerPhases' (and how many world chunks
+# were loaded and stored under 'chunks'). Each run is made in a new
+# process of its own, so its memory use and sprite cache counts are just
+# its own.
+
+import os
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1') # keep pygame's banner (once per run's process) out of the report on stdout
+
+import sys, json, time, random, argparse, platform, resource, tracemalloc
+import multiprocessing
+import numpy, pygame
+
+import gooseworld, gooseeatgoose
+from profiles import PROFILES
+from frameprofiler import FrameProfiler
+
+DEFAULTGEESE = (27, 100, 1000, 10000) # geese per run; the other populations grow in proportion
+PERCENTILES = (50, 95, 99)
+KEYS = (pygame.K_LEFT, pygame.K_RIGHT, pygame.K_UP, pygame.K_DOWN)
+KEYFLAGS = {pygame.K_LEFT: gooseworld.MOVELEFT, pygame.K_RIGHT: gooseworld.MOVERIGHT,
+            pygame.K_UP: gooseworld.MOVEUP, pygame.K_DOWN: gooseworld.MOVEDOWN}
+KEYHOLDTICKS = 30 # how many ticks each scripted key is held for
+
+
+def getPopulation(profile, numGeese):
+    # the profile's populations, scaled so that there are numGeese geese
+    scale = numGeese / profile.numGeese
+    return {'numGeese': numGeese,
+            'numGrass': max(1, round(profile.numGrass * scale)),
+            'numPoop': max(1, round(profile.numPoop * scale)) if profile.numPoop else 0,
+            'numTool': max(1, round(profile.numTool * scale)) if profile.numTool else 0}
+
+
+class ScriptedKeys:
+    # Which arrow key is held down at each tick: a random one every
+    # KEYHOLDTICKS ticks, the same every run with the same seed.
+
+    def __init__(self, seed):
+        self.random = random.Random(seed)
+        self.key = None
+
+
+    def getKey(self, tick):
+        if self.key is None or tick % KEYHOLDTICKS == 0:
+            self.key = self.random.choice(KEYS)
+        return self.key
+
+
+class PhaseTimer:
+    # Collects how long each phase of each frame took, in nanoseconds.
+
+    def __init__(self, phases):
+        self.phases = phases
+        self.times = dict((phase, []) for phase in phases)
+        self.frameTimes = []
+
+
+    def addFrame(self, phaseTimes):
+        # phaseTimes holds the nanoseconds for each phase, in order
+        for phase, phaseTime in zip(self.phases, phaseTimes):
+            self.times[phase].append(phaseTime)
+        self.frameTimes.append(sum(phaseTimes))
+
+
+    def report(self):
+        report = {'frame': getPercentiles(self.frameTimes), 'phases': {}}
+        for phase in self.phases:
+            report['phases'][phase] = getPercentiles(self.times[phase])
+        totalSeconds = sum(self.frameTimes) / 1e9
+        report['ticksPerSecond'] = len(self.frameTimes) / totalSeconds if totalSeconds else 0.0
+        return report
+
+
+def getPercentiles(times):
+    # nanoseconds in, milliseconds out
+    if not times:
+        return {}
+    values = numpy.percentile(numpy.array(times, dtype=numpy.float64) / 1e6, PERCENTILES)
+    report = dict(('p%d' % percentile, round(float(value), 4)) for percentile, value in zip(PERCENTILES, values))
+    report['mean'] = round(float(numpy.mean(times)) / 1e6, 4)
+    return report
+
+
+def benchmarkVariant(profile, ticks, warmupTicks, seed):
+    # Runs gooseeatgoose.py's game loop one tick per frame, as fast as it
+    # goes, for the variant profile (which gooseeatgoose.loadGame() must
+    # have been called with).
+    scriptedKeys = ScriptedKeys(seed)
+    worldSeeds = random.Random(seed)
+    profiler = FrameProfiler(enabled=True, historyFrames=ticks) # keeps just the timed frames
+    world = gooseworld.World(makeSurface=gooseeatgoose.makeGooseSurface, seed=worldSeeds.randrange(2**32), profiler=profiler, profile=profile)
+    grassChunks = gooseeatgoose.GrassChunks(gooseeatgoose.GRASSIMAGES, gooseeatgoose.GRASSCOLOR, gooseeatgoose.GRASSCHUNKSIZE)
+    timer = PhaseTimer(('events', 'step', 'draw', 'present'))
+    perf = time.perf_counter_ns
+
+    for tick in range(warmupTicks + ticks):
+        start = perf()
+        profiler.beginFrame()
+        pygame.event.pump()
+        pygame.event.get()
+        inputs = KEYFLAGS[scriptedKeys.getKey(tick)]
+        profiler.mark('events')
+        afterEvents = perf()
+        world.step(inputs)
+        afterStep = perf()
+        gooseeatgoose.drawWorld(world, grassChunks, profiler=profiler)
+        afterDraw = perf()
+        pygame.display.update()
+        profiler.mark('display')
+        profiler.endFrame()
+        end = perf()
+        if tick >= warmupTicks:
+            timer.addFrame((afterEvents - start, afterStep - afterEvents, afterDraw - afterStep, end - afterDraw))
+        if world.done:
+            # start a new game, as runGame() would
+            world = gooseworld.World(makeSurface=gooseeatgoose.makeGooseSurface, seed=worldSeeds.randrange(2**32), profiler=profiler, profile=profile)
+            grassChunks = gooseeatgoose.GrassChunks(gooseeatgoose.GRASSIMAGES, gooseeatgoose.GRASSCOLOR, gooseeatgoose.GRASSCHUNKSIZE)
+
+    report = timer.report()
+    report['profilerPhases'] = profiler.report()
+    report['spriteCache'] = gooseeatgoose.SPRITECACHE.stats()
+    report['assets'] = gooseeatgoose.ASSETS.stats()
+    report['chunks'] = world.chunks.stats() # of the last World
+    return report
+
+
+def runBenchmark(variant, numGeese, ticks, warmupTicks, seed, memoryTicks):
+    # Time the frames, then run again for a little while with tracemalloc on
+    # (which slows everything down) to see the peak memory use.
+    population = getPopulation(PROFILES[variant], numGeese)
+    profile = PROFILES[variant].replace(**population)
+    gooseeatgoose.loadGame(profile)
+    report = {'variant': variant, 'seed': seed, 'ticks': ticks}
+    report.update(population)
+    report.update(benchmarkVariant(profile, ticks, warmupTicks, seed))
+
+    if memoryTicks:
+        tracemalloc.start()
+        benchmarkVariant(profile, memoryTicks, 0, seed)
+        report['peakTracedBytes'] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    report['maxRSSBytes'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024 # the most this process has used
+    return report
+
+
+def runBenchmarkProcess(connection, *args):
+    # the process runSeparately() starts: sends back runBenchmark(*args)
+    connection.send(runBenchmark(*args))
+    connection.close()
+
+
+def runSeparately(*args):
+    # runBenchmark(*args) in a new process (spawned, so it starts with
+    # nothing loaded), so that nothing from other runs counts in its report
+    context = multiprocessing.get_context('spawn')
+    connection, processConnection = context.Pipe(duplex=False)
+    process = context.Process(target=runBenchmarkProcess, args=(processConnection,) + args)
+    process.start()
+    processConnection.close()
+    try:
+        report = connection.recv()
+    except EOFError:
+        raise RuntimeError('the benchmark process stopped unexpectedly')
+    process.join()
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Headless frame time benchmark for the goose game.')
+    parser.add_argument('--ticks', type=int, default=300, help='frames to time for each run')
+    parser.add_argument('--warmup', type=int, default=30, help='frames to run before timing')
+    parser.add_argument('--memory-ticks', type=int, default=60, help='frames to run with tracemalloc on (0 to skip)')
+    parser.add_argument('--geese', default=','.join(map(str, DEFAULTGEESE)), help='comma separated goose counts to sweep')
+    parser.add_argument('--variants', default=','.join(PROFILES), help='comma separated variants to run: ' + ', '.join(PROFILES))
+    parser.add_argument('--seed', type=int, default=1, help='random seed for the worlds and the scripted keys')
+    parser.add_argument('--output', help='write the JSON report here instead of to stdout')
+    args = parser.parse_args()
+
+    os.chdir(os.path.dirname(os.path.abspath(__file__))) # the images are loaded from here
+
+    runs = []
+    for variant in args.variants.split(','):
+        if variant not in PROFILES:
+            parser.error('unknown variant %r' % variant)
+        for numGeese in args.geese.split(','):
+            print('running %s with %s geese' % (variant, numGeese), file=sys.stderr)
+            runs.append(runSeparately(variant, int(numGeese), args.ticks, args.warmup, args.seed, args.memory_ticks))
+
+    report = {'python': platform.python_version(),
+              'pygame': pygame.version.ver,
+              'numpy': numpy.__version__,
+              'platform': platform.platform(),
+              'runs': runs}
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as outputFile:
+            outputFile.write(text + '\n')
+    else:
+        print(text)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,490 +1,531 @@
-# GOOSE EAT GOOSE
-# based on SQUIRREL EAT SQUIRREL 
-# by Rukia Beduni, Amy Kusnandar, Nashrah Purnita
-
-import random, sys, time, math, pygame
-from pygame.locals import *
-
-FPS = 30 # frames per second to update the screen
-WINWIDTH = 640 # width of the program's window, in pixels
-WINHEIGHT = 480 # height in pixels
-HALF_WINWIDTH = int(WINWIDTH / 2)
-HALF_WINHEIGHT = int(WINHEIGHT / 2)
-
-GRASSCOLOR = (24, 255, 0)
-WHITE = (255, 255, 255)
-RED = (255, 0, 0)
-
-CAMERASLACK = 90     # how far from the center the squirrel moves before moving the camera
-MOVERATE = 9         # how fast the player moves
-BOUNCERATE = 6       # how fast the player bounces (large is slower)
-BOUNCEHEIGHT = 30    # how high the player bounces
-STARTSIZE = 30       # how big the player starts off
-WINSIZE = 500        # how big the player needs to be to win
-INVULNTIME = 2       # how long the player is invulnerable after being hit in seconds
-GAMEOVERTIME = 4     # how long the "game over" text stays on the screen in seconds
-MAXHEALTH = 3        # how much health the player starts with
-
-NUMGRASS = 80    # number of grass objects in the active area
-NUMGEESE = 27    # number of geese in the active area
-NUMPOOP = 5      # number of poop objects in the active area
-NUMTOOL = 2      # number of tool objects in the active area
-GOOSEMINSPEED = 3 # slowest goose speed
-GOOSEMAXSPEED = 7 # fastest goose speed
-DIRCHANGEFREQ = 2    # % chance of direction change per frame
-LEFT = 'left'
-RIGHT = 'right'
-
-"""
-This program has three data structures to represent the player, enemy squirrels, and grass background objects. The data structures are dictionaries with the following keys:
-
-Keys used by all three data structures:
-    'x' - the left edge coordinate of the object in the game world (not a pixel coordinate on the screen)
-    'y' - the top edge coordinate of the object in the game world (not a pixel coordinate on the screen)
-    'rect' - the pygame.Rect object representing where on the screen the object is located.
-Player data structure keys:
-    'surface' - the pygame.Surface object that stores the image of the squirrel which will be drawn to the screen.
-    'facing' - either set to LEFT or RIGHT, stores which direction the player is facing.
-    'size' - the width and height of the player in pixels. (The width & height are always the same.)
-    'bounce' - represents at what point in a bounce the player is in. 0 means standing (no bounce), up to BOUNCERATE (the completion of the bounce)
-    'health' - an integer showing how many more times the player can be hit by a larger squirrel before dying.
-Enemy Goose data structure keys:
-    'surface' - the pygame.Surface object that stores the image of the squirrel which will be drawn to the screen.
-    'movex' - how many pixels per frame the squirrel moves horizontally. A negative integer is moving to the left, a positive to the right.
-    'movey' - how many pixels per frame the squirrel moves vertically. A negative integer is moving up, a positive moving down.
-    'width' - the width of the squirrel's image, in pixels
-    'height' - the height of the squirrel's image, in pixels
-    'bounce' - represents at what point in a bounce the player is in. 0 means standing (no bounce), up to BOUNCERATE (the completion of the bounce)
-    'bouncerate' - how quickly the squirrel bounces. A lower number means a quicker bounce.
-    'bounceheight' - how high (in pixels) the squirrel bounces
-Grass data structure keys:
-    'grassImage' - an integer that refers to the index of the pygame.Surface object in GRASSIMAGES used for this grass object
-"""
-
-def main():
-    global FPSCLOCK, DISPLAYSURF, BASICFONT, L_GOOSE_IMG, R_GOOSE_IMG, GRASSIMAGES, POOPIMAGES, TOOLIMAGE
-
-    pygame.init()
-    FPSCLOCK = pygame.time.Clock()
-    pygame.display.set_icon(pygame.image.load('gameicon.png'))
-    DISPLAYSURF = pygame.display.set_mode((WINWIDTH, WINHEIGHT))
-    pygame.display.set_caption('Goose Eat Goose')
-    BASICFONT = pygame.font.Font('freesansbold.ttf', 32)
-
-    # load the image files
-    L_GOOSE_IMG = pygame.image.load('gooseimg.png')
-    R_GOOSE_IMG = pygame.transform.flip(L_GOOSE_IMG, True, False)
-    POOPIMAGES = pygame.image.load('goosepoop.png')
-    TOOLIMAGE = pygame.image.load('tool.png')
-    GRASSIMAGES = []
-    for i in range(1, 5):
-        GRASSIMAGES.append(pygame.image.load('grass%s.png' % i))
-
-    while True:
-        runGame()
-
-
-def runGame():
-    # set up variables for the start of a new game
-    invulnerableMode = False  # if the player is invulnerable
-    invulnerableStartTime = 0 # time the player became invulnerable
-    gameOverMode = False      # if the player has lost
-    gameOverStartTime = 0     # time the player lost
-    winMode = False           # if the player has won
-
-    # create the surfaces to hold game text
-    gameOverSurf = BASICFONT.render('Game Over', True, WHITE)
-    gameOverRect = gameOverSurf.get_rect()
-    gameOverRect.center = (HALF_WINWIDTH, HALF_WINHEIGHT)
-
-    winSurf = BASICFONT.render('You have achieved', True, WHITE)
-    winRect = winSurf.get_rect()
-    winRect.center = (HALF_WINWIDTH, HALF_WINHEIGHT)
-
-    winSurf2 = BASICFONT.render('ULTIMATE UWATERLOO GOOSE!', True, WHITE)
-    winRect2 = winSurf2.get_rect()
-    winRect2.center = (HALF_WINWIDTH, HALF_WINHEIGHT + 30)
-
-    winSurf3 = BASICFONT.render('(Press "r" to restart.)', True, WHITE)
-    winRect3 = winSurf3.get_rect()
-    winRect3.center = (HALF_WINWIDTH, HALF_WINHEIGHT + 60)
-
-    # camerax and cameray are the top left of where the camera view is
-    camerax = 0
-    cameray = 0
-
-    grassObjs = []    # stores all the grass objects in the game
-    gooseObjs = []    # stores all the non-player goose objects
-    poopObjs = []     # stores all the poop objects in the game
-    toolObjs = []     # stores all the tool objects in the game
-    
-    # stores the player object:
-    playerObj = {'surface': pygame.transform.scale(L_GOOSE_IMG, (STARTSIZE, STARTSIZE)),
-                 'facing': LEFT,
-                 'size': STARTSIZE,
-                 'x': HALF_WINWIDTH,
-                 'y': HALF_WINHEIGHT,
-                 'bounce':0,
-                 'health': MAXHEALTH}
-
-    moveLeft  = False
-    moveRight = False
-    moveUp    = False
-    moveDown  = False
-
-    # start off with some random grass images on the screen
-    for i in range(10):
-        grassObjs.append(makeNewGrass(camerax, cameray))
-        grassObjs[i]['x'] = random.randint(0, WINWIDTH)
-        grassObjs[i]['y'] = random.randint(0, WINHEIGHT)
-
-    # random poop on the screen
-    for i in range(4):
-        poopObjs.append(makeNewPoop(camerax, cameray))
-        poopObjs[i]['x'] = random.randint(0, WINWIDTH)
-        poopObjs[i]['y'] = random.randint(0, WINHEIGHT)
-    
-    # random and rare tool objects
-    for i in range(2):
-        toolObjs.append(makeNewTool(camerax, cameray))
-        toolObjs[i]['x'] = random.randint(0, WINWIDTH)
-        toolObjs[i]['y'] = random.randint(0, WINHEIGHT)
-
-    while True: # main game loop
-        # check if we should turn off invulnerability
-        if invulnerableMode and time.time() - invulnerableStartTime > INVULNTIME:
-            invulnerableMode = False
-
-
-        # move all the geese
-        for sObj in gooseObjs:
-            # move the goose, and adjust for their bounce
-            sObj['x'] += sObj['movex']
-            sObj['y'] += sObj['movey']
-            sObj['bounce'] += 1
-            if sObj['bounce'] > sObj['bouncerate']:
-                sObj['bounce'] = 0 # reset bounce amount
-
-            # random chance they change direction
-            if random.randint(0, 99) < DIRCHANGEFREQ:
-                sObj['movex'] = getRandomVelocity()
-                sObj['movey'] = getRandomVelocity()
-                if sObj['movex'] > 0: # faces right
-                    sObj['surface'] = pygame.transform.scale(R_GOOSE_IMG, (sObj['width'], sObj['height']))
-                else: # faces left
-                    sObj['surface'] = pygame.transform.scale(L_GOOSE_IMG, (sObj['width'], sObj['height']))
-
-
-        # go through all the objects and see if any need to be deleted.
-        for i in range(len(grassObjs) - 1, -1, -1):
-            if isOutsideActiveArea(camerax, cameray, grassObjs[i]):
-                del grassObjs[i] 
-        for i in range(len(gooseObjs) - 1, -1, -1):
-            if isOutsideActiveArea(camerax, cameray, gooseObjs[i]):
-                del gooseObjs[i]
-        for i in range(len(poopObjs) - 1, -1, -1):
-            if isOutsideActiveArea(camerax, cameray, poopObjs[i]):
-                del poopObjs[i]
-
-            
-
-        # add more grass & squirrels if we don't have enough.
-        while len(grassObjs) < NUMGRASS:
-            grassObjs.append(makeNewGrass(camerax, cameray))
-        while len(gooseObjs) < NUMGEESE:
-            gooseObjs.append(makeNewGoose(camerax, cameray))
-        while len(poopObjs) < NUMPOOP:
-            poopObjs.append(makeNewPoop(camerax, cameray))
-        while len(toolObjs) < NUMTOOL:
-            toolObjs.append(makeNewTool(camerax, cameray))
-
-
-        # adjust camerax and cameray if beyond the "camera slack"
-        playerCenterx = playerObj['x'] + int(playerObj['size'] / 2)
-        playerCentery = playerObj['y'] + int(playerObj['size'] / 2)
-        if (camerax + HALF_WINWIDTH) - playerCenterx > CAMERASLACK:
-            camerax = playerCenterx + CAMERASLACK - HALF_WINWIDTH
-        elif playerCenterx - (camerax + HALF_WINWIDTH) > CAMERASLACK:
-            camerax = playerCenterx - CAMERASLACK - HALF_WINWIDTH
-        if (cameray + HALF_WINHEIGHT) - playerCentery > CAMERASLACK:
-            cameray = playerCentery + CAMERASLACK - HALF_WINHEIGHT
-        elif playerCentery - (cameray + HALF_WINHEIGHT) > CAMERASLACK:
-            cameray = playerCentery - CAMERASLACK - HALF_WINHEIGHT
-
-        # draw the green background
-        DISPLAYSURF.fill(GRASSCOLOR)
-
-        # draw all the grass objects on the screen
-        for gObj in grassObjs:
-            gRect = pygame.Rect( (gObj['x'] - camerax,
-                                  gObj['y'] - cameray,
-                                  gObj['width'],
-                                  gObj['height']) )
-            DISPLAYSURF.blit(GRASSIMAGES[gObj['grassImage']], gRect)
-
-        # draw all the poop objects on the screen
-        for pObj in poopObjs:
-            pObj['rect'] = pygame.Rect( (pObj['x'] - camerax,
-                                         pObj['y'] - cameray,
-                                         pObj['width'],
-                                         pObj['height']))
-            DISPLAYSURF.blit(POOPIMAGES, pObj['rect']) 
-       
-        # draw all the tool objects on the screen 
-        for tObj in toolObjs:
-            tObj['rect'] = pygame.Rect( (tObj['x'] - camerax,
-                                         tObj['y'] - cameray,
-                                         tObj['width'],
-                                         tObj['height']))
-            DISPLAYSURF.blit(TOOLIMAGE, tObj['rect'])
-        
-        # draw the other squirrels
-        for sObj in gooseObjs:
-            sObj['rect'] = pygame.Rect( (sObj['x'] - camerax,
-                                         sObj['y'] - cameray - getBounceAmount(sObj['bounce'], sObj['bouncerate'], sObj['bounceheight']),
-                                         sObj['width'],
-                                         sObj['height']) )
-            DISPLAYSURF.blit(sObj['surface'], sObj['rect'])
-
-
-        # draw the player squirrel
-        flashIsOn = round(time.time(), 1) * 10 % 2 == 1
-        if not gameOverMode and not (invulnerableMode and flashIsOn):
-            playerObj['rect'] = pygame.Rect( (playerObj['x'] - camerax,
-                                              playerObj['y'] - cameray - getBounceAmount(playerObj['bounce'], BOUNCERATE, BOUNCEHEIGHT),
-                                              playerObj['size'],
-                                              playerObj['size']) )
-            DISPLAYSURF.blit(playerObj['surface'], playerObj['rect'])
-
-
-
-        # draw the health meter
-        drawHealthMeter(playerObj['health'])
-
-        for event in pygame.event.get(): # event handling loop
-            if event.type == QUIT:
-                terminate()
-
-            elif event.type == KEYDOWN:
-                if event.key in (K_UP, K_w):
-                    moveDown = False
-                    moveUp = True
-                elif event.key in (K_DOWN, K_s):
-                    moveUp = False
-                    moveDown = True
-                elif event.key in (K_LEFT, K_a):
-                    moveRight = False
-                    moveLeft = True
-                    if playerObj['facing'] != LEFT: # change player image
-                        playerObj['surface'] = pygame.transform.scale(L_GOOSE_IMG, (playerObj['size'], playerObj['size']))
-                    playerObj['facing'] = LEFT
-                elif event.key in (K_RIGHT, K_d):
-                    moveLeft = False
-                    moveRight = True
-                    if playerObj['facing'] != RIGHT: # change player image
-                        playerObj['surface'] = pygame.transform.scale(R_GOOSE_IMG, (playerObj['size'], playerObj['size']))
-                    playerObj['facing'] = RIGHT
-                elif winMode and event.key == K_r:
-                    return
-
-            elif event.type == KEYUP:
-                # stop moving the player's squirrel
-                if event.key in (K_LEFT, K_a):
-                    moveLeft = False
-                elif event.key in (K_RIGHT, K_d):
-                    moveRight = False
-                elif event.key in (K_UP, K_w):
-                    moveUp = False
-                elif event.key in (K_DOWN, K_s):
-                    moveDown = False
-
-                elif event.key == K_ESCAPE:
-                    terminate()
-
-        if not gameOverMode:
-            # actually move the player
-            if moveLeft:
-                playerObj['x'] -= MOVERATE
-            if moveRight:
-                playerObj['x'] += MOVERATE
-            if moveUp:
-                playerObj['y'] -= MOVERATE
-            if moveDown:
-                playerObj['y'] += MOVERATE
-
-            if (moveLeft or moveRight or moveUp or moveDown) or playerObj['bounce'] != 0:
-                playerObj['bounce'] += 1
-
-            if playerObj['bounce'] > BOUNCERATE:
-                playerObj['bounce'] = 0 # reset bounce amount
-
-            # check if the player has collided with any squirrels
-            for i in range(len(gooseObjs)-1, -1, -1):
-                sqObj = gooseObjs[i]
-                if 'rect' in sqObj and playerObj['rect'].colliderect(sqObj['rect']):
-                    # a player/squirrel collision has occurred
-                    if sqObj['width'] * sqObj['height'] <= playerObj['size']**2:
-                        # player is larger and eats the squirrel
-                        playerObj['size'] += int( (sqObj['width'] * sqObj['height'])**0.2 ) + 1
-                        del gooseObjs[i]
-
-                        if playerObj['facing'] == LEFT:
-                            playerObj['surface'] = pygame.transform.scale(L_GOOSE_IMG, (playerObj['size'], playerObj['size']))
-                        if playerObj['facing'] == RIGHT:
-                            playerObj['surface'] = pygame.transform.scale(R_GOOSE_IMG, (playerObj['size'], playerObj['size']))
-
-                        if playerObj['size'] > WINSIZE:
-                            winMode = True # turn on "win mode"
-                            if playerObj['size'] >= 600:
-                                return
-
-                    elif not invulnerableMode:
-                        # player is smaller and takes damage
-                        invulnerableMode = True
-                        invulnerableStartTime = time.time()
-                        playerObj['health'] -= 1                      
-                        if playerObj['health'] == 0:
-                            gameOverMode = True # turn on "game over mode"
-                            gameOverStartTime = time.time()
-            
-            # check if the player has collided with poop
-            for i in range(len(poopObjs)-1, -1, -1):
-                pObj = poopObjs[i]
-                if 'rect' in pObj and playerObj['rect'].colliderect(pObj['rect']):
-                    playerObj['size'] -= 3
-                    del poopObjs[i] 
-                    if playerObj['facing'] == LEFT:
-                            playerObj['surface'] = pygame.transform.scale(L_GOOSE_IMG, (playerObj['size'], playerObj['size']))
-                    if playerObj['facing'] == RIGHT:
-                            playerObj['surface'] = pygame.transform.scale(R_GOOSE_IMG, (playerObj['size'], playerObj['size']))
-            
-            # check if the player has collided with any tools
-            for i in range(len(toolObjs)-1, -1, -1):
-                toObj = toolObjs[i]
-                if 'rect' in toObj and playerObj['rect'].colliderect(toObj['rect']):
-                    playerObj['size'] += 20
-                    del toolObjs[i]
-                    if playerObj['facing'] == LEFT:
-                            playerObj['surface'] = pygame.transform.scale(L_GOOSE_IMG, (playerObj['size'], playerObj['size']))
-                    if playerObj['facing'] == RIGHT:
-                            playerObj['surface'] = pygame.transform.scale(R_GOOSE_IMG, (playerObj['size'], playerObj['size']))
-                    if playerObj['size'] > WINSIZE:
-                        winMode = True 
-                        if playerObj['size'] >= 600:
-                                return
-                    
-            
-            
-        
-        else:
-            # game is over, show "game over" text
-            DISPLAYSURF.blit(gameOverSurf, gameOverRect)
-            if time.time() - gameOverStartTime > GAMEOVERTIME:
-                return # end the current game
-
-        # check if the player has won.
-        if winMode:
-            DISPLAYSURF.blit(winSurf, winRect)
-            DISPLAYSURF.blit(winSurf2, winRect2)
-            DISPLAYSURF.blit(winSurf3, winRect3)
-
-        pygame.display.update()
-        FPSCLOCK.tick(FPS)
-
-
-def drawHealthMeter(currentHealth):
-    for i in range(currentHealth): # draw red health bars
-        pygame.draw.rect(DISPLAYSURF, RED,   (15, 5 + (10 * MAXHEALTH) - i * 10, 20, 10))
-    for i in range(MAXHEALTH): # draw the white outlines
-        pygame.draw.rect(DISPLAYSURF, WHITE, (15, 5 + (10 * MAXHEALTH) - i * 10, 20, 10), 1)
-
-
-def terminate():
-    pygame.quit()
-    sys.exit()
-
-
-def getBounceAmount(currentBounce, bounceRate, bounceHeight):
-    # Returns the number of pixels to offset based on the bounce.
-    # Larger bounceRate means a slower bounce.
-    # Larger bounceHeight means a higher bounce.
-    # currentBounce will always be less than bounceRate
-    return int(math.sin( (math.pi / float(bounceRate)) * currentBounce ) * bounceHeight)
-
-def getRandomVelocity():
-    speed = random.randint(GOOSEMINSPEED, GOOSEMAXSPEED)
-    if random.randint(0, 1) == 0:
-        return speed
-    else:
-        return -speed
-
-
-def getRandomOffCameraPos(camerax, cameray, objWidth, objHeight):
-    # create a Rect of the camera view
-    cameraRect = pygame.Rect(camerax, cameray, WINWIDTH, WINHEIGHT)
-    while True:
-        x = random.randint(camerax - WINWIDTH, camerax + (2 * WINWIDTH))
-        y = random.randint(cameray - WINHEIGHT, cameray + (2 * WINHEIGHT))
-        # create a Rect object with the random coordinates and use colliderect()
-        # to make sure the right edge isn't in the camera view.
-        objRect = pygame.Rect(x, y, objWidth, objHeight)
-        if not objRect.colliderect(cameraRect):
-            return x, y
-
-
-def makeNewGoose(camerax, cameray):
-    sq = {}
-    generalSize = random.randint(5, 50)
-    multiplier = random.randint(1, 4)
-    sq['width']  = (generalSize + random.randint(0, 15)) * multiplier
-    sq['height'] = (generalSize + random.randint(0, 15)) * multiplier
-    sq['x'], sq['y'] = getRandomOffCameraPos(camerax, cameray, sq['width'], sq['height'])
-    sq['movex'] = getRandomVelocity()
-    sq['movey'] = getRandomVelocity()
-    if sq['movex'] < 0: # squirrel is facing left
-        sq['surface'] = pygame.transform.scale(L_GOOSE_IMG, (sq['width'], sq['height']))
-    else: # squirrel is facing right
-        sq['surface'] = pygame.transform.scale(R_GOOSE_IMG, (sq['width'], sq['height']))
-    sq['bounce'] = 0
-    sq['bouncerate'] = random.randint(10, 18)
-    sq['bounceheight'] = random.randint(10, 50)
-    return sq
-
-
-def makeNewGrass(camerax, cameray):
-    gr = {}
-    gr['grassImage'] = random.randint(0, len(GRASSIMAGES) - 1)
-    gr['width']  = GRASSIMAGES[0].get_width()
-    gr['height'] = GRASSIMAGES[0].get_height()
-    gr['x'], gr['y'] = getRandomOffCameraPos(camerax, cameray, gr['width'], gr['height'])
-    gr['rect'] = pygame.Rect( (gr['x'], gr['y'], gr['width'], gr['height']) )
-    return gr
-
-def makeNewPoop(camerax, cameray):
-    po = {}
-    po['width']  = POOPIMAGES.get_width()
-    po['height'] = POOPIMAGES.get_height()
-    po['x'], po['y'] = getRandomOffCameraPos(camerax, cameray, po['width'], po['height'])
-    po['rect'] = pygame.Rect( (po['x'], po['y'], po['width'], po['height']))
-    return po
-
-def makeNewTool(camerax, cameray):
-    to = {}
-    to['width'] = TOOLIMAGE.get_width()
-    to['height'] = TOOLIMAGE.get_height()
-    to['x'], to['y'] = getRandomOffCameraPos(camerax, cameray, to['width'], to['height'])
-    to['rect'] = pygame.Rect( (to['x'], to['y'], to['width'], to['height']))
-    return to
-
-def isOutsideActiveArea(camerax, cameray, obj):
-    # Return False if camerax and cameray are more than
-    # a half-window length beyond the edge of the window.
-    boundsLeftEdge = camerax - WINWIDTH
-    boundsTopEdge = cameray - WINHEIGHT
-    boundsRect = pygame.Rect(boundsLeftEdge, boundsTopEdge, WINWIDTH * 3, WINHEIGHT * 3)
-    objRect = pygame.Rect(obj['x'], obj['y'], obj['width'], obj['height'])
-    return not boundsRect.colliderect(objRect)
-
-
-if __name__ == '__main__':
-    main()
+# GOOSE EAT GOOSE
+# based on SQUIRREL EAT SQUIRREL 
+# by Rukia Beduni, Amy Kusnandar, Nashrah Purnita
+
+import time
+STARTTIME = time.perf_counter_ns() # when the game started loading, for the startup report
+
+import os, sys, pygame, numpy
+from pygame.locals import *
+from gooseworld import *
+from assets import Assets
+from spritecache import SpriteCache
+from dirtyrects import DirtyRects
+from grasschunks import GrassChunks
+from replay import Recording, loadRecording
+from profiles import getProfile, FALLBACKIMAGE
+from frameprofiler import FrameProfiler, StartupTimer, NOPROFILER
+from levelofdetail import DetailController, getDetailLevel, DETAILLEVELS, GRASSSTEP, SPRITESIZESTEP
+# (framecapture and gooseserver are only imported when they are used, as
+# the server pulls in asyncio, which takes a while)
+
+STARTUP = StartupTimer(STARTTIME)
+STARTUP.mark('imports')
+
+GRASSCOLOR = (24, 255, 0)
+WHITE = (255, 255, 255)
+RED = (255, 0, 0)
+
+GRASSCHUNKSIZE = 256 # size of the pre-rendered background chunks, in pixels
+SPRITECACHEBYTES = 8 * 1024 * 1024 # how much memory the scaled goose images may use
+DIRTYRECTS = '--dirty-rects' in sys.argv[1:] # only send the parts of the screen that changed to the display
+VSYNC = '--vsync' in sys.argv[1:] # draw one frame per display refresh
+DEBUGKEY = K_F3     # shows and hides the frame profiler
+RENDERFPS = 60       # most frames per second to draw (0 means no limit); the game itself always runs at FPS ticks per second
+MAXFRAMETIME = 0.25  # longest time in seconds one frame can catch up on, so a long stall doesn't fast forward the game
+FASTBLITS = hasattr(pygame.Surface, 'fblits') # pygame-ce's fblits() skips making the Rects that blits() returns
+STARTUPREPORT = '--startup-report' in sys.argv[1:] # print how long each step of starting up took, once the first frame is shown
+FONTFILE = 'freesansbold.ttf'
+BASICFONTSIZE = 32
+DEBUGFONTSIZE = 12
+
+# The game world itself (the player, geese, grass, poop, tools and the
+# camera) lives in gooseworld.py. This file opens the window, turns key
+# presses into World.step() inputs and draws the world every frame. The
+# same code plays every variant of the game (see profiles.py).
+#
+# The world is stepped FPS times per second of real time however fast
+# frames are drawn: each frame runs as many ticks as the time since the last
+# one covers, and draws the world part of the way between the last two ticks
+# so movement stays smooth when frames and ticks don't line up.
+
+def main(variant=None):
+    # variant is the name of the profile to play, if not given on the
+    # command line with --variant (it is Goose Eat Goose if neither is)
+    if REPLAYFILE is not None:
+        variant = loadRecording(REPLAYFILE).variant
+    loadGame(getProfile(variant or getCommandLineOption('--variant') or 'goose'))
+    if CONNECTADDRESS is not None:
+        playOnline(CONNECTADDRESS, int(getCommandLineOption('--session') or 0))
+    gameNumber = 0
+    while True:
+        gameNumber += 1
+        runGame(gameNumber)
+
+
+def loadGame(profile=DEFAULTPROFILE):
+    # open the window and load everything the game needs for a variant
+    global FPSCLOCK, DISPLAYSURF, ASSETS, L_GOOSE_IMG, R_GOOSE_IMG, GRASSIMAGES, POOPIMAGES, TOOLIMAGE, SPRITECACHE, PROFILER, PROFILE, CAPTURE, DETAIL, HASVSYNC
+
+    PROFILE = profile
+
+    # start reading the image files on other threads while the window opens
+    ASSETS = Assets()
+    playerImage = profile.playerImage if os.path.exists(profile.playerImage) else FALLBACKIMAGE
+    imageFiles = {'icon': 'gameicon.png', 'goose': playerImage, 'poop': 'goosepoop.png', 'tool': 'tool.png'}
+    for i in range(1, 5):
+        imageFiles['grass%s' % i] = 'grass%s.png' % i
+    ASSETS.startLoading(imageFiles)
+
+    # only the display is needed (which brings events and the clock with
+    # it): no sound, no joysticks, and the font module starts when the
+    # first text is drawn
+    pygame.display.init()
+    FPSCLOCK = pygame.time.Clock()
+    STARTUP.mark('display init')
+    pygame.display.set_icon(ASSETS.getLoaded('icon'))
+    DISPLAYSURF = None
+    HASVSYNC = False # whether the display really is waiting for each refresh
+    if VSYNC:
+        try:
+            DISPLAYSURF = pygame.display.set_mode((WINWIDTH, WINHEIGHT), SCALED, vsync=1)
+            # pygame-ce can also tell when the window opened but vsync didn't come on
+            HASVSYNC = pygame.display.is_vsync() if hasattr(pygame.display, 'is_vsync') else True
+        except pygame.error:
+            pass # no vsync here, so fall back to RENDERFPS
+    if DISPLAYSURF is None:
+        DISPLAYSURF = pygame.display.set_mode((WINWIDTH, WINHEIGHT))
+    pygame.display.set_caption(profile.caption)
+    STARTUP.mark('window')
+
+    # convert the images to the display's format, with the small unscaled
+    # ones packed into one atlas
+    ASSETS.finishLoading()
+    L_GOOSE_IMG = ASSETS.get('goose')
+    R_GOOSE_IMG = ASSETS.add('goose flipped', pygame.transform.flip(L_GOOSE_IMG, True, False))
+    ASSETS.pack(['poop', 'tool'] + ['grass%s' % i for i in range(1, 5)])
+    POOPIMAGES = ASSETS.get('poop')
+    TOOLIMAGE = ASSETS.get('tool')
+    GRASSIMAGES = [ASSETS.get('grass%s' % i) for i in range(1, 5)]
+
+    # geese of the same size and facing share one scaled image
+    SPRITECACHE = SpriteCache({LEFT: L_GOOSE_IMG, RIGHT: R_GOOSE_IMG}, SPRITECACHEBYTES)
+
+    # times each phase of each frame while the debug overlay is shown
+    PROFILER = FrameProfiler()
+
+    # draws in less detail when frames take too long (a frame's work should
+    # fit in the time until the next one is due)
+    DETAIL = DetailController(1e9 / (RENDERFPS or FPS), None if DETAILOPTION is None else getDetailLevel(DETAILOPTION))
+    setDetailLevel(DETAIL.level)
+
+    # saves every frame shown, if asked to on the command line
+    CAPTURE = None
+    if CAPTUREDIR is not None:
+        from framecapture import FrameCapture
+        CAPTURE = FrameCapture(CAPTUREDIR, DISPLAYSURF, getCommandLineOption('--capture-format') or 'png')
+    STARTUP.mark('assets')
+
+
+# Fonts and text are only made the first time they are drawn: most frames
+# have no text on them at all, so there's no need to wait for them before
+# the first one.
+FONTS = {}     # size -> Font
+TEXTSURFS = {} # (text, size, center) -> (Surface, Rect) of white text
+
+def getFont(size):
+    font = FONTS.get(size)
+    if font is None:
+        if not pygame.font.get_init():
+            pygame.font.init()
+        font = FONTS[size] = pygame.font.Font(FONTFILE, size)
+    return font
+
+
+def getText(text, center, size=BASICFONTSIZE):
+    # the rendered text and where it goes to be centered on center
+    key = (text, size, center)
+    textSurfAndRect = TEXTSURFS.get(key)
+    if textSurfAndRect is None:
+        textSurf = getFont(size).render(text, True, WHITE)
+        textSurfAndRect = TEXTSURFS[key] = (textSurf, textSurf.get_rect(center=center))
+    return textSurfAndRect
+
+
+def finishStartup():
+    # the first frame has been shown
+    STARTUP.finish('first frame')
+    if STARTUPREPORT:
+        print(STARTUP.getText(), file=sys.stderr)
+
+
+def getCommandLineOption(name):
+    # Returns the value given after name on the command line (as in
+    # "--record game.replay"), or None if name isn't there.
+    args = sys.argv[1:]
+    if name in args[:-1]:
+        return args[args.index(name) + 1]
+    return None
+
+
+RECORDFILE = getCommandLineOption('--record') # save each game's seed and inputs to this file
+REPLAYFILE = getCommandLineOption('--replay') # play back the game saved in this file
+CONNECTADDRESS = getCommandLineOption('--connect') # play on the gooseserver.py server at this port or Unix socket
+CAPTUREDIR = getCommandLineOption('--capture') # save every frame shown into this directory (see framecapture.py)
+DETAILOPTION = getCommandLineOption('--detail') # draw at this level of detail all the time (see levelofdetail.py)
+
+
+def runGame(gameNumber=1):
+    # set up the world for the start of a new game, from the recording if
+    # one is being played back. gameNumber counts the games since the
+    # program started, from 1.
+    playback = None
+    if REPLAYFILE is not None:
+        playback = loadRecording(REPLAYFILE)
+    world = World(makeSurface=makeGooseSurface, seed=playback.seed if playback else None, profiler=PROFILER, profile=PROFILE)
+    STARTUP.mark('world')
+
+    recording = None
+    if RECORDFILE is not None:
+        recording = Recording(world.seed, variant=PROFILE.name)
+    try:
+        playGame(world, recording, playback)
+    finally:
+        # save the game even if the player quit in the middle of it
+        if recording is not None:
+            recording.checksum = world.getChecksum()
+            recording.save(getRecordFilename(gameNumber))
+
+
+def getRecordFilename(gameNumber):
+    # the file to save game number gameNumber in: RECORDFILE for the first
+    # game, then game-2.replay, game-3.replay... for "--record game.replay"
+    if gameNumber == 1:
+        return RECORDFILE
+    root, extension = os.path.splitext(RECORDFILE)
+    return '%s-%d%s' % (root, gameNumber, extension)
+
+
+def playGame(world, recording=None, playback=None):
+    # Run the main game loop until this game is over. Every tick's inputs
+    # are added to recording, if given. If playback is given, its inputs are
+    # used instead of the keyboard's.
+
+    grassChunks = GrassChunks(GRASSIMAGES, GRASSCOLOR, GRASSCHUNKSIZE)
+    setDetailLevel(DETAIL.level, grassChunks, world)
+    dirtyRects = DirtyRects() if DIRTYRECTS else None
+
+    inputs = 0 # the MOVE flags for the keys being held down
+
+    tickTime = 1.0 / FPS           # how many seconds one world tick stands for
+    lag = 0.0                      # how many seconds of game time haven't been stepped yet
+    lastTime = time.perf_counter() # when the last frame started
+
+    while True: # main game loop
+        frameStart = time.perf_counter_ns()
+        PROFILER.beginFrame()
+        for event in pygame.event.get(): # event handling loop
+            if event.type == QUIT:
+                terminate()
+
+            elif event.type == KEYDOWN:
+                if world.winMode and event.key == K_r:
+                    return
+                elif event.key == DEBUGKEY:
+                    PROFILER.toggle() # show or hide the frame profiler
+                inputs = getMoveInputs(event, inputs)
+
+            elif event.type == KEYUP:
+                if event.key == K_ESCAPE:
+                    terminate()
+                inputs = getMoveInputs(event, inputs)
+
+        PROFILER.mark('events')
+
+        # step the world once for every tick that has passed
+        now = time.perf_counter()
+        lag += min(now - lastTime, MAXFRAMETIME)
+        lastTime = now
+        while lag >= tickTime:
+            if playback is not None:
+                if world.tickCount == len(playback.inputs):
+                    endPlayback(world, playback)
+                inputs = playback.inputs[world.tickCount]
+            world.step(inputs)
+            if recording is not None:
+                recording.record(inputs)
+            lag -= tickTime
+            if playback is not None and (world.done or world.tickCount == len(playback.inputs)):
+                # the recorded game is over (a game that ended by itself
+                # ends on its last recorded tick)
+                endPlayback(world, playback)
+            if world.done:
+                return # end the current game
+
+        drawWorld(world, grassChunks, dirtyRects, lag / tickTime, PROFILER)
+
+        textSurfs = ()
+        if world.gameOverMode:
+            # game is over, show "game over" text
+            textSurfs = (getText('Game Over', (HALF_WINWIDTH, HALF_WINHEIGHT)),)
+
+        # check if the player has won.
+        if world.winMode:
+            # one line of the variant's win text under the other
+            textSurfs = [getText(line, (HALF_WINWIDTH, HALF_WINHEIGHT + 30 * i)) for i, line in enumerate(world.profile.winText)]
+
+        for textSurf, textRect in textSurfs:
+            DISPLAYSURF.blit(textSurf, textRect)
+            if dirtyRects is not None:
+                dirtyRects.add(textRect, textSurf)
+
+        if PROFILER.enabled:
+            # show the profiler next to the health meter
+            rect = PROFILER.drawOverlay(DISPLAYSURF, getFont(DEBUGFONTSIZE), (45, 5))
+            if dirtyRects is not None:
+                dirtyRects.add(rect, PROFILER.overlaySurf)
+        PROFILER.mark('text')
+
+        # (how long updating the display takes isn't counted, as with vsync
+        # it includes waiting for the display)
+        if DETAIL.frame(time.perf_counter_ns() - frameStart):
+            setDetailLevel(DETAIL.level, grassChunks, world)
+            print('detail level %s (frames at each level so far: %s)' % (DETAILLEVELS[DETAIL.level], DETAIL.stats()['framesAtLevel']),
+                  file=sys.stderr)
+
+        if dirtyRects is not None:
+            dirtyRects.update()
+        else:
+            pygame.display.update()
+        PROFILER.mark('display')
+        if not STARTUP.finished:
+            finishStartup()
+        if CAPTURE is not None:
+            CAPTURE.capture(DISPLAYSURF)
+            PROFILER.mark('capture')
+        FPSCLOCK.tick(0 if HASVSYNC else RENDERFPS)
+        PROFILER.mark('waiting')
+        PROFILER.endFrame()
+
+
+def getMoveInputs(event, inputs):
+    # Returns the MOVE flags inputs, changed for a KEYDOWN or KEYUP event
+    # of an arrow or WASD key. Pressing a key stops the player moving the
+    # opposite way.
+    for keys, flag, opposite in (((K_UP, K_w), MOVEUP, MOVEDOWN), ((K_DOWN, K_s), MOVEDOWN, MOVEUP),
+                                 ((K_LEFT, K_a), MOVELEFT, MOVERIGHT), ((K_RIGHT, K_d), MOVERIGHT, MOVELEFT)):
+        if event.key in keys:
+            if event.type == KEYDOWN:
+                return (inputs & ~opposite) | flag
+            return inputs & ~flag
+    return inputs
+
+
+def playOnline(address, sessionNumber=0):
+    # Play in a session on a gooseserver.py server: the server runs the
+    # world, so all this does is send it the keys being held down and draw
+    # the latest snapshot it has sent back.
+    from gooseserver import connectSocket, SnapshotReader, parseSnapshot
+    sock = connectSocket(address, sessionNumber)
+    sock.setblocking(False)
+    snapshotReader = SnapshotReader()
+    snapshot = None
+    inputs = 0
+    sentInputs = None
+
+    while True:
+        for event in pygame.event.get():
+            if event.type == QUIT or (event.type == KEYUP and event.key == K_ESCAPE):
+                terminate()
+            elif event.type in (KEYDOWN, KEYUP):
+                inputs = getMoveInputs(event, inputs)
+        if inputs != sentInputs:
+            try:
+                sock.sendall(bytes((inputs,)))
+                sentInputs = inputs
+            except BlockingIOError:
+                pass # the send buffer is full, so try again next frame
+            except ConnectionError:
+                print('lost the connection to the server')
+                terminate()
+
+        # read everything that has arrived, keeping only the newest snapshot
+        while True:
+            try:
+                data = sock.recv(65536)
+            except BlockingIOError:
+                break
+            except ConnectionError:
+                data = b''
+            if not data:
+                print('the server closed the connection')
+                terminate()
+            snapshots = snapshotReader.feed(data)
+            if snapshots:
+                snapshot = parseSnapshot(snapshots[-1])
+
+        if snapshot is not None:
+            drawSnapshot(snapshot)
+            if snapshot.gameOverMode:
+                DISPLAYSURF.blit(*getText('Game Over', (HALF_WINWIDTH, HALF_WINHEIGHT)))
+            elif snapshot.winMode:
+                # (there is no restarting a shared world)
+                DISPLAYSURF.blit(*getText(PROFILE.winText[0], (HALF_WINWIDTH, HALF_WINHEIGHT)))
+        pygame.display.update()
+        if not STARTUP.finished:
+            finishStartup()
+        if CAPTURE is not None:
+            CAPTURE.capture(DISPLAYSURF)
+        FPSCLOCK.tick(RENDERFPS)
+
+
+def drawSnapshot(snapshot):
+    # draw a snapshot from the server, the way drawWorld() draws a World
+    from gooseserver import PLAYERRIGHT, PLAYERINVULNERABLE
+    DISPLAYSURF.fill(GRASSCOLOR)
+    blitLayer([(GRASSIMAGES[grassImage], (x, y)) for x, y, grassImage in snapshot.grass.tolist()])
+    blitLayer([(POOPIMAGES, (x, y)) for x, y in snapshot.poop.tolist()])
+    blitLayer([(TOOLIMAGE, (x, y)) for x, y in snapshot.tool.tolist()])
+    blitLayer([(makeGooseSurface(FACINGS[facing], width, height, True), (x, top))
+               for x, top, width, height, facing in snapshot.geese.tolist()])
+    flashIsOn = round(time.time(), 1) * 10 % 2 == 1
+    for seatId, x, y, size, flags in snapshot.players.tolist():
+        if not (flags & PLAYERINVULNERABLE and flashIsOn):
+            DISPLAYSURF.blit(makeGooseSurface(RIGHT if flags & PLAYERRIGHT else LEFT, size, size), (x, y))
+    drawHealthMeter(snapshot.health)
+
+
+def endPlayback(world, playback):
+    # the recording has run out, so say if it played back the same and quit
+    checksum = world.getChecksum()
+    if playback.checksum is None or checksum == playback.checksum:
+        print('played back %s ticks, checksum %s' % (world.tickCount, checksum))
+    else:
+        print('played back %s ticks, checksum %s does NOT match the recording (%s)' % (world.tickCount, checksum, playback.checksum))
+    terminate()
+
+
+def makeGooseSurface(facing, width, height, rounded=False):
+    # the goose image scaled for a goose (or the player) of this size; the
+    # other geese are drawn rounded (see SpriteCache), but the player's
+    # image always matches the rect it collides with
+    return SPRITECACHE.get(facing, width, height, rounded)
+
+
+def setDetailLevel(level, grassChunks=None, world=None):
+    # draw at level (an index into DETAILLEVELS) from now on
+    if grassChunks is not None:
+        grassChunks.grassStep = GRASSSTEP if level >= 2 else 1
+    if world is not None:
+        world.geese.bouncing = level < 1
+    SPRITECACHE.sizeStep = SPRITESIZESTEP if level >= 3 else 1
+
+
+def drawWorld(world, grassChunks, dirtyRects=None, alpha=1.0, profiler=NOPROFILER):
+    # Draw the world as seen from its camera. alpha is how far between the
+    # world's last two ticks to draw everything that moves, from 0 (where
+    # it was before the last tick) to 1 (where it is now). If dirtyRects is
+    # given, the screen rect of everything drawn is added to it. Each layer
+    # is marked as a phase on profiler.
+    mark = profiler.mark
+    camerax = interpolate(world.prevCamerax, world.camerax, alpha)
+    cameray = interpolate(world.prevCameray, world.cameray, alpha)
+    if dirtyRects is not None:
+        dirtyRects.beginFrame(camerax, cameray)
+
+    # draw the green background and the grass on it
+    grassChunks.draw(DISPLAYSURF, world, camerax, cameray, dirtyRects)
+    mark('grass blits')
+
+    # draw all the poop objects on the screen
+    blitLayer(getOnScreen(POOPIMAGES, world.poopObjs, camerax, cameray), dirtyRects)
+    mark('poop blits')
+
+    # draw all the tool objects on the screen
+    blitLayer(getOnScreen(TOOLIMAGE, world.toolObjs, camerax, cameray), dirtyRects)
+    mark('tool blits')
+
+    # draw the other geese, skipping the ones that are off screen (most of
+    # the active area is)
+    geese = world.geese
+    geeseX = numpy.rint(geese.prevx + (geese.x - geese.prevx) * alpha).astype(numpy.int64) - camerax
+    geeseY = numpy.rint(geese.prevtop + (geese.top - geese.prevtop) * alpha).astype(numpy.int64) - cameray
+    onScreen = numpy.flatnonzero((geeseX < WINWIDTH) & (geeseX + geese.width > 0) &
+                                 (geeseY < WINHEIGHT) & (geeseY + geese.height > 0))
+    blitLayer([(makeGooseSurface(FACINGS[facing], width, height, True), (x, y))
+               for x, y, width, height, facing in zip(geeseX[onScreen].tolist(), geeseY[onScreen].tolist(),
+                                                      geese.width[onScreen].tolist(), geese.height[onScreen].tolist(),
+                                                      geese.facing[onScreen].tolist())],
+              dirtyRects)
+    mark('goose blits')
+
+    # draw the player goose
+    playerObj = world.playerObj
+    flashIsOn = round(time.time(), 1) * 10 % 2 == 1
+    if not world.gameOverMode and not (world.invulnerableMode and flashIsOn):
+        prevx, prevy = world.prevPlayerPos
+        rect = DISPLAYSURF.blit(playerObj.surface, (interpolate(prevx, playerObj.rect.x, alpha) - camerax,
+                                                       interpolate(prevy, playerObj.rect.y, alpha) - cameray))
+        if dirtyRects is not None:
+            dirtyRects.add(rect, playerObj.surface)
+
+    # draw the health meter
+    rect = drawHealthMeter(playerObj.health)
+    if dirtyRects is not None:
+        dirtyRects.add(rect, ('health', playerObj.health))
+    mark('player+hud')
+
+
+def getOnScreen(image, objs, camerax, cameray):
+    # (image, screen position) pairs for blitLayer() for the objects in objs
+    # that the camera can see
+    left = camerax - image.get_width()
+    top = cameray - image.get_height()
+    right = camerax + WINWIDTH
+    bottom = cameray + WINHEIGHT
+    return [(image, (obj.x - camerax, obj.y - cameray)) for obj in objs
+            if left < obj.x < right and top < obj.y < bottom]
+
+
+def blitLayer(sprites, dirtyRects=None):
+    # Blit a list of (surface, (x, y)) pairs onto the screen in one call,
+    # adding the screen rect of each to dirtyRects if it is given.
+    if dirtyRects is not None:
+        for rect, sprite in zip(DISPLAYSURF.blits(sprites), sprites):
+            dirtyRects.add(rect, sprite[0])
+    elif FASTBLITS:
+        DISPLAYSURF.fblits(sprites)
+    else:
+        DISPLAYSURF.blits(sprites, False)
+
+
+def interpolate(prev, current, alpha):
+    # the whole pixel alpha of the way from prev to current
+    return int(round(prev + (current - prev) * alpha))
+
+
+def drawHealthMeter(currentHealth):
+    for i in range(currentHealth): # draw red health bars
+        pygame.draw.rect(DISPLAYSURF, RED,   (15, 5 + (10 * MAXHEALTH) - i * 10, 20, 10))
+    for i in range(MAXHEALTH): # draw the white outlines
+        pygame.draw.rect(DISPLAYSURF, WHITE, (15, 5 + (10 * MAXHEALTH) - i * 10, 20, 10), 1)
+    return pygame.Rect(15, 15, 20, 10 * MAXHEALTH) # the area the health meter covers
+
+
+def terminate():
+    if DETAIL.fixedLevel is None and sum(DETAIL.degrades):
+        print('detail levels: %s' % DETAIL.stats(), file=sys.stderr)
+    try:
+        if CAPTURE is not None:
+            # finish writing the frames that are waiting (this raises the
+            # error that stopped the writing, if one did)
+            CAPTURE.close()
+    finally:
+        if CAPTURE is not None:
+            print('captured frames: %s' % CAPTURE.stats(), file=sys.stderr)
+        pygame.quit()
+    sys.exit()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,459 @@
+# GOOSE EAT GOOSE - environments for automated players
+# GooseEnv plays one World through reset() and step(), the way agents
+# usually expect: step() takes the player's inputs and returns what the
+# player can see (an observation), a reward and whether the game is over.
+#
+# VecGooseEnv plays many games at once, each on its own World, and hands
+# back arrays for the whole batch. The games are exactly the game's, chunks
+# and all, but each World is still stepped one after another.
+#
+# ApproxVecGooseEnv is the quick one for when the games only need to be
+# like the real game: it doesn't step a World per game, it keeps every
+# game's player, geese, poop and tools in (games x objects) NumPy arrays
+# and steps all of them with the same handful of array operations, by
+# simpler rules (see the class). A policy trained on it should be checked
+# on VecGooseEnv or GooseEnv, since it won't play quite the same there.
+# None of them needs a display.
+#
+# Run "python gooseenv.py [WORLDS] [STEPS]" to see how many steps per second
+# VecGooseEnv and ApproxVecGooseEnv manage with random inputs, and
+# "python gooseenv.py --check [WORLDS] [STEPS]" to check that VecGooseEnv
+# plays every game exactly the way GooseEnv does.
+
+import random
+import numpy
+from gooseworld import *
+
+OBSGEESE = 8       # how many of the nearest geese an observation describes
+OBSPLAYER = 3      # size, health and whether the player is invulnerable (1 or 0)
+OBSGOOSE = 4       # dx, dy, width and height of a goose
+OBSPICKUPS = 4     # dx and dy of the nearest poop, then of the nearest tool
+OBSSIZE = OBSPLAYER + OBSGEESE * OBSGOOSE + OBSPICKUPS
+SPAWNBATCH = 4096  # how many new geese VecGooseEnv makes at a time
+HEALTHLOSSREWARD = -10 # reward for each hit the player takes, on top of how much it grew
+ACTIONS = tuple(range(16)) # every combination of the MOVE flags
+
+# how far the player moves in x and y for each combination of MOVE flags
+MOVES = numpy.array([(((flags & MOVERIGHT) > 0) * MOVERATE - ((flags & MOVELEFT) > 0) * MOVERATE,
+                      ((flags & MOVEDOWN) > 0) * MOVERATE - ((flags & MOVEUP) > 0) * MOVERATE) for flags in ACTIONS])
+
+# An observation is an array of OBSSIZE float32s: the OBSPLAYER numbers,
+# then the OBSGEESE geese nearest to the player (nearest first), then
+# OBSPICKUPS. dx and dy go from the center of the player to the center of
+# the goose or pickup. Where there are fewer geese (or no poop or tools)
+# the numbers are 0.
+
+def getObservations(size, health, invulnerable, geese, poop, tool):
+    # Observations for a batch of games, as a (games x OBSSIZE) array.
+    # size, health and invulnerable are arrays with one entry per game.
+    # geese is a tuple of (games x geese) arrays (dx, dy, width, height)
+    # and poop and tool are tuples of (games x pickups) arrays (dx, dy).
+    numWorlds = len(size)
+    observations = numpy.zeros((numWorlds, OBSSIZE), dtype=numpy.float32)
+    observations[:, 0] = size
+    observations[:, 1] = health
+    observations[:, 2] = invulnerable
+
+    dx, dy, width, height = geese
+    numGeese = dx.shape[1]
+    if numGeese:
+        # the index numbers (into the flattened arrays) of each game's nearest geese
+        nearest = numpy.argsort(dx * dx + dy * dy, axis=1)[:, :OBSGEESE]
+        nearest += (numpy.arange(numWorlds) * numGeese)[:, numpy.newaxis]
+        columns = numpy.empty(nearest.shape + (OBSGOOSE,), dtype=numpy.float32)
+        for column, array in enumerate((dx, dy, width, height)):
+            columns[:, :, column] = array.ravel().take(nearest)
+        observations[:, OBSPLAYER:OBSPLAYER + nearest.shape[1] * OBSGOOSE] = columns.reshape(numWorlds, -1)
+
+    start = OBSPLAYER + OBSGEESE * OBSGOOSE
+    for dx, dy in (poop, tool):
+        numPickups = dx.shape[1]
+        if numPickups == 1:
+            observations[:, start] = dx[:, 0]
+            observations[:, start + 1] = dy[:, 0]
+        elif numPickups:
+            nearest = numpy.argmin(dx * dx + dy * dy, axis=1) + numpy.arange(0, dx.size, numPickups)
+            observations[:, start] = dx.ravel().take(nearest)
+            observations[:, start + 1] = dy.ravel().take(nearest)
+        start += 2
+    return observations
+
+
+# BOUNCETABLE flattened, so that VecGooseEnv can look up every goose's
+# bounce offset with one take(): the offset for a goose at currentBounce
+# is BOUNCEAMOUNTS[bounceBase + currentBounce * BOUNCESTRIDE]
+BOUNCEAMOUNTS = BOUNCETABLE.ravel()
+BOUNCESTRIDE = BOUNCETABLE.shape[2]
+
+def getBounceBases(bounceRate, bounceHeight):
+    return bounceRate * BOUNCETABLE.shape[1] * BOUNCESTRIDE + bounceHeight
+
+
+def getReward(sizeDelta, healthLoss):
+    return sizeDelta + HEALTHLOSSREWARD * healthLoss
+
+
+class GooseEnv:
+    # One game played on a real World, so everything happens exactly as it
+    # does in the game. step() returns (observation, reward, done, info),
+    # where info is a dict with the 'sizeDelta' and 'healthLoss' the reward
+    # was made from. A game is done when the player has lost or won.
+
+    def __init__(self, profile=DEFAULTPROFILE):
+        self.profile = profile
+        self.world = None
+
+
+    def reset(self, seed=None):
+        self.world = World(seed=seed, profile=self.profile)
+        return self.getObservation()
+
+
+    def step(self, action):
+        world = self.world
+        playerObj = world.playerObj
+        size = playerObj.size
+        health = playerObj.health
+        world.step(action)
+        sizeDelta = playerObj.size - size
+        healthLoss = health - playerObj.health
+        done = world.gameOverMode or world.winMode or world.done
+        return self.getObservation(), getReward(sizeDelta, healthLoss), done, {'sizeDelta': sizeDelta, 'healthLoss': healthLoss}
+
+
+    def getObservation(self):
+        world = self.world
+        playerObj = world.playerObj
+        centerx = playerObj.rect.centerx
+        centery = playerObj.rect.centery
+        geese = world.geese
+        gooseColumns = (geese.x + geese.width // 2 - centerx, geese.top + geese.height // 2 - centery,
+                        geese.width, geese.height)
+        pickups = []
+        for objs in (world.poopObjs, world.toolObjs):
+            dx = numpy.array([obj.rect.centerx - centerx for obj in objs], dtype=numpy.int64)
+            dy = numpy.array([obj.rect.centery - centery for obj in objs], dtype=numpy.int64)
+            pickups.append((dx[numpy.newaxis], dy[numpy.newaxis]))
+        return getObservations([playerObj.size], [playerObj.health], [world.invulnerableMode],
+                               tuple(column[numpy.newaxis] for column in gooseColumns), pickups[0], pickups[1])[0]
+
+
+class VecGooseEnv:
+    # numWorlds games of a profile, played in lockstep. step() takes an
+    # array of MOVE flags, one per game, and returns arrays of observations
+    # (numWorlds x OBSSIZE), rewards and dones, and an info dict of arrays
+    # ('sizeDelta', 'healthLoss' and 'episodeSteps', how long each game that
+    # just finished lasted). A game that is done is reset straight away, so
+    # the observation returned for it is the new game's first.
+    #
+    # Each game is played by a GooseEnv, so it goes exactly as it would
+    # there. The games' World seeds all come from reset()'s seed, and
+    # seeds[i] is the seed of the game being played in slot i.
+
+    def __init__(self, numWorlds, profile=DEFAULTPROFILE):
+        self.numWorlds = numWorlds
+        self.profile = profile
+        self.envs = [GooseEnv(profile) for i in range(numWorlds)]
+        self.seeds = [None] * numWorlds
+        self.worldSeeds = random.Random()
+        self.steps = numpy.zeros(numWorlds, dtype=numpy.int64) # steps into each current game
+
+
+    def reset(self, seed=None):
+        # start every game again, seeding the games' Worlds from seed
+        self.worldSeeds = random.Random(seed)
+        return numpy.stack([self.resetWorld(i) for i in range(self.numWorlds)])
+
+
+    def resetWorld(self, i):
+        # start a new game in slot i and return its first observation
+        self.seeds[i] = self.worldSeeds.randrange(2**32)
+        self.steps[i] = 0
+        return self.envs[i].reset(self.seeds[i])
+
+
+    def step(self, actions):
+        numWorlds = self.numWorlds
+        observations = numpy.empty((numWorlds, OBSSIZE), dtype=numpy.float32)
+        rewards = numpy.empty(numWorlds, dtype=numpy.int64)
+        dones = numpy.empty(numWorlds, dtype=bool)
+        sizeDelta = numpy.empty(numWorlds, dtype=numpy.int64)
+        healthLoss = numpy.empty(numWorlds, dtype=numpy.int64)
+        episodeSteps = numpy.zeros(numWorlds, dtype=numpy.int64)
+        self.steps += 1
+        for i, action in enumerate(numpy.asarray(actions).tolist()):
+            observations[i], rewards[i], dones[i], info = self.envs[i].step(action)
+            sizeDelta[i] = info['sizeDelta']
+            healthLoss[i] = info['healthLoss']
+            if dones[i]:
+                episodeSteps[i] = self.steps[i]
+                observations[i] = self.resetWorld(i)
+        return observations, rewards, dones, {'sizeDelta': sizeDelta, 'healthLoss': healthLoss, 'episodeSteps': episodeSteps}
+
+
+class ApproxVecGooseEnv:
+    # The same as VecGooseEnv (the same arguments, and step() returns the
+    # same things), but much quicker, by stepping every game with array
+    # operations. It follows World.step()'s rules, except that:
+    #   - there are always profile.numGeese geese, numPoop poop and numTool
+    #     tools around each player: the ones that leave the active area
+    #     (or are eaten or picked up) are replaced by new ones off camera,
+    #     the way the game worked before the world was split into chunks
+    #   - every goose the player eats in a tick is compared with the size
+    #     the player was at the start of the tick
+    #   - there is no grass (it doesn't do anything)
+    # All the randomness comes from one NumPy Generator for the whole batch.
+
+    def __init__(self, numWorlds, profile=DEFAULTPROFILE):
+        self.numWorlds = numWorlds
+        self.profile = profile
+        self.rng = numpy.random.default_rng()
+        shape = (numWorlds,)
+        self.playerx = numpy.zeros(shape, dtype=numpy.int64)
+        self.playery = numpy.zeros(shape, dtype=numpy.int64)
+        self.playerTop = numpy.zeros(shape, dtype=numpy.int64) # playery after the bounce offset
+        self.size = numpy.zeros(shape, dtype=numpy.int64)
+        self.health = numpy.zeros(shape, dtype=numpy.int64)
+        self.bounce = numpy.zeros(shape, dtype=numpy.int64)
+        self.invulnerableTicks = numpy.zeros(shape, dtype=numpy.int64)
+        self.camerax = numpy.zeros(shape, dtype=numpy.int64)
+        self.cameray = numpy.zeros(shape, dtype=numpy.int64)
+        self.steps = numpy.zeros(shape, dtype=numpy.int64) # steps into the current game
+
+        # geese[name] is a (numWorlds x numGeese) array, for name in
+        # GOOSECOLUMNS, 'top', 'area', 'growth' (how much eating the goose
+        # grows the player by) and 'bouncebase' (see getBounceBases())
+        self.geese = dict((name, numpy.zeros((numWorlds, profile.numGeese), dtype=numpy.int64))
+                          for name in GOOSECOLUMNS + ('top', 'area', 'growth', 'bouncebase'))
+        self.newGeese = {'x': ()} # see takeNewGeese()
+        self.spawned = 0
+        # the poop and then the tools: where they are, (numWorlds x pickups)
+        # arrays, and the size of each column's pickup and how much it
+        # grows the player by
+        numPickups = profile.numPoop + profile.numTool
+        self.pickupx = numpy.zeros((numWorlds, numPickups), dtype=numpy.int64)
+        self.pickupy = numpy.zeros((numWorlds, numPickups), dtype=numpy.int64)
+        self.pickupWidth = numpy.array([POOPSIZE[0]] * profile.numPoop + [TOOLSIZE[0]] * profile.numTool, dtype=numpy.int64)
+        self.pickupHeight = numpy.array([POOPSIZE[1]] * profile.numPoop + [TOOLSIZE[1]] * profile.numTool, dtype=numpy.int64)
+        self.pickupGrowth = numpy.array([-3] * profile.numPoop + [20] * profile.numTool, dtype=numpy.int64)
+
+
+    def reset(self, seed=None):
+        # start every game again, seeding the batch's random numbers with seed
+        self.rng = numpy.random.default_rng(seed)
+        self.newGeese = {'x': ()}
+        self.spawned = 0
+        self.resetWorlds(numpy.ones(self.numWorlds, dtype=bool))
+        return self.getObservations()
+
+
+    def resetWorlds(self, mask):
+        # start the games where mask is True again, with everything spawned off camera
+        self.playerx[mask] = HALF_WINWIDTH
+        self.playery[mask] = HALF_WINHEIGHT
+        self.playerTop[mask] = HALF_WINHEIGHT
+        self.size[mask] = self.profile.startSize
+        self.health[mask] = MAXHEALTH
+        self.bounce[mask] = 0
+        self.invulnerableTicks[mask] = 0
+        self.camerax[mask] = 0
+        self.cameray[mask] = 0
+        self.steps[mask] = 0
+        self.spawnGeese(numpy.repeat(mask[:, numpy.newaxis], self.profile.numGeese, axis=1))
+        self.spawnPickups(numpy.repeat(mask[:, numpy.newaxis], len(self.pickupGrowth), axis=1))
+
+
+    def spawnGeese(self, mask):
+        # new geese off camera in the slots where mask (numWorlds x numGeese) is True
+        worlds, slots = numpy.nonzero(mask)
+        if not len(worlds):
+            return
+        newGeese = self.takeNewGeese(len(worlds))
+        geese = self.geese
+        for name, array in newGeese.items():
+            geese[name][worlds, slots] = array
+        geese['x'][worlds, slots] += self.camerax[worlds]
+        y = newGeese['y'] + self.cameray[worlds]
+        geese['y'][worlds, slots] = y
+        geese['top'][worlds, slots] = y
+
+
+    def takeNewGeese(self, count):
+        # Returns count new geese (a dict of arrays like makeNewGeese() makes,
+        # plus 'area' and 'growth'), placed off a camera at (0, 0). They are
+        # made SPAWNBATCH at a time, since most steps only need a few.
+        if self.spawned + count > len(self.newGeese['x']):
+            newGeese = makeNewGeese(max(SPAWNBATCH, count), 0, 0, self.rng, self.profile)
+            newGeese['area'] = newGeese['width'] * newGeese['height']
+            newGeese['growth'] = (newGeese['area'] ** 0.2).astype(numpy.int64) + 1
+            newGeese['bouncebase'] = getBounceBases(newGeese['bouncerate'], newGeese['bounceheight'])
+            self.newGeese = newGeese
+            self.spawned = 0
+        start = self.spawned
+        self.spawned += count
+        return dict((name, array[start:self.spawned]) for name, array in self.newGeese.items())
+
+
+    def spawnPickups(self, mask):
+        # new poop or tools off camera where mask (numWorlds x pickups) is True
+        worlds, slots = numpy.nonzero(mask)
+        if not len(worlds):
+            return
+        self.pickupx[worlds, slots], self.pickupy[worlds, slots] = getRandomOffCameraPositions(
+            self.camerax[worlds], self.cameray[worlds], self.pickupWidth[slots], self.pickupHeight[slots], self.rng)
+
+
+    def step(self, actions):
+        # Advance every game by one tick, in the order World.step() does.
+        actions = numpy.asarray(actions, dtype=numpy.int64)
+        rng = self.rng
+        geese = self.geese
+        size = self.size
+        startSize = size.copy()
+        startHealth = self.health.copy()
+        self.steps += 1
+
+        numpy.maximum(self.invulnerableTicks - 1, 0, out=self.invulnerableTicks)
+
+        # move the geese, bounce them and turn a few at random
+        x, y, movex, movey = geese['x'], geese['y'], geese['movex'], geese['movey']
+        width, height, bounce, bouncerate = geese['width'], geese['height'], geese['bounce'], geese['bouncerate']
+        x += movex
+        y += movey
+        bounce += 1
+        numpy.multiply(bounce, bounce <= bouncerate, out=bounce) # reset bounce amount
+        # Rather than rolling for every goose, roll how many turn and then
+        # which ones (a goose picked twice just turns once).
+        turned = rng.integers(0, x.size, rng.binomial(x.size, DIRCHANGEFREQ / 100))
+        if len(turned):
+            velocities = getRandomVelocities(2 * len(turned), rng)
+            movex.ravel()[turned] = velocities[:len(turned)]
+            movey.ravel()[turned] = velocities[len(turned):]
+        gooseTop = geese['top']
+        numpy.subtract(y, BOUNCEAMOUNTS.take(geese['bouncebase'] + bounce * BOUNCESTRIDE), out=gooseTop)
+
+        # whatever has left the active area is replaced at the end of the
+        # step, along with what the player eats or picks up (none of it can
+        # reach the player in the meantime)
+        left, top, right, bottom = (edge[:, numpy.newaxis] for edge in getActiveArea(self.camerax, self.cameray))
+        replacedGeese = (x >= right) | (x + width <= left) | (y >= bottom) | (y + height <= top)
+        pickupx, pickupy, pickupWidth, pickupHeight = self.pickupx, self.pickupy, self.pickupWidth, self.pickupHeight
+        replacedPickups = ((pickupx >= right) | (pickupx + pickupWidth <= left) |
+                           (pickupy >= bottom) | (pickupy + pickupHeight <= top))
+
+        # move the camera (if the player is beyond the camera slack), then the player
+        for camera, center, halfWindow in ((self.camerax, self.playerx + size // 2, HALF_WINWIDTH),
+                                           (self.cameray, self.playery + size // 2, HALF_WINHEIGHT)):
+            offset = center - (camera + halfWindow)
+            camera += numpy.where(offset > CAMERASLACK, offset - CAMERASLACK, 0) + numpy.where(offset < -CAMERASLACK, offset + CAMERASLACK, 0)
+        self.playerx += MOVES[actions, 0]
+        self.playery += MOVES[actions, 1]
+        self.bounce += (actions != 0) | (self.bounce != 0)
+        self.bounce[self.bounce > BOUNCERATE] = 0
+        numpy.subtract(self.playery, BOUNCETABLE[BOUNCERATE, self.bounce, BOUNCEHEIGHT], out=self.playerTop)
+
+        # the geese touching the player: the smaller ones are eaten, and a
+        # bigger one hurts the player unless it was just hurt
+        playerLeft = self.playerx[:, numpy.newaxis]
+        playerTop = self.playerTop[:, numpy.newaxis]
+        playerRight = playerLeft + size[:, numpy.newaxis]
+        playerBottom = playerTop + size[:, numpy.newaxis]
+        touching = (x < playerRight) & (x + width > playerLeft) & (gooseTop < playerBottom) & (gooseTop + height > playerTop)
+        eaten = touching & (geese['area'] <= (size * size)[:, numpy.newaxis])
+        hurt = (touching & ~eaten).any(axis=1) & (self.invulnerableTicks == 0)
+        self.health -= hurt
+        self.invulnerableTicks[hurt] = INVULNTIME * FPS
+        size += (geese['growth'] * eaten).sum(axis=1)
+        self.spawnGeese(replacedGeese | eaten)
+
+        # poop shrinks the player and tools make it grow, if it is still alive
+        alive = self.health > 0
+        pickedUp = (alive[:, numpy.newaxis] & (pickupx < playerRight) & (pickupx + pickupWidth > playerLeft) &
+                    (pickupy < playerBottom) & (pickupy + pickupHeight > playerTop))
+        size += (self.pickupGrowth * pickedUp).sum(axis=1)
+        self.spawnPickups(replacedPickups | pickedUp)
+
+        sizeDelta = size - startSize
+        healthLoss = startHealth - self.health
+        done = ~alive | (size > self.profile.winSize)
+        info = {'sizeDelta': sizeDelta, 'healthLoss': healthLoss, 'episodeSteps': numpy.where(done, self.steps, 0)}
+        if done.any():
+            self.resetWorlds(done)
+        return self.getObservations(), getReward(sizeDelta, healthLoss), done, info
+
+
+    def getObservations(self):
+        size = self.size
+        centerx = (self.playerx + size // 2)[:, numpy.newaxis]
+        centery = (self.playerTop + size // 2)[:, numpy.newaxis]
+        geese = self.geese
+        width = geese['width']
+        height = geese['height']
+        gooseColumns = (geese['x'] + width // 2 - centerx, geese['top'] + height // 2 - centery, width, height)
+        pickupdx = self.pickupx + self.pickupWidth // 2 - centerx
+        pickupdy = self.pickupy + self.pickupHeight // 2 - centery
+        numPoop = self.profile.numPoop
+        return getObservations(size, self.health, self.invulnerableTicks > 0, gooseColumns,
+                               (pickupdx[:, :numPoop], pickupdy[:, :numPoop]), (pickupdx[:, numPoop:], pickupdy[:, numPoop:]))
+
+
+def checkVecGooseEnv(numWorlds, steps, seed=0, profile=DEFAULTPROFILE):
+    # Plays numWorlds games on a VecGooseEnv with random inputs, then plays
+    # every game it started again on a GooseEnv, from the same World seed
+    # with the same inputs. Returns how many steps didn't give the same
+    # observation, reward and done on both (which should be none). The
+    # observation after a game ends is the next game's first in
+    # VecGooseEnv, so only the reward and done are compared there.
+    env = VecGooseEnv(numWorlds, profile)
+    observations = env.reset(seed)
+    rng = numpy.random.default_rng(seed)
+    games = [(env.seeds[i], observations[i], []) for i in range(numWorlds)] # (seed, first observation, steps) for each slot's game
+    finished = []
+    for step in range(steps):
+        actions = rng.choice(ACTIONS, numWorlds)
+        observations, rewards, dones, info = env.step(actions)
+        for i in range(numWorlds):
+            games[i][2].append((int(actions[i]), observations[i], rewards[i], dones[i]))
+            if dones[i]:
+                finished.append(games[i])
+                games[i] = (env.seeds[i], observations[i], [])
+
+    mismatches = 0
+    single = GooseEnv(profile)
+    for worldSeed, firstObservation, moves in finished + games:
+        mismatches += not numpy.array_equal(single.reset(worldSeed), firstObservation)
+        for action, observation, reward, done in moves:
+            singleObservation, singleReward, singleDone, singleInfo = single.step(action)
+            mismatches += (singleReward != reward or singleDone != done or
+                           not (done or numpy.array_equal(singleObservation, observation)))
+    return mismatches
+
+
+if __name__ == '__main__':
+    # step a batch of games with random inputs to see how fast it goes, or
+    # check VecGooseEnv against GooseEnv
+    import sys, time
+    args = sys.argv[1:]
+    check = '--check' in args
+    if check:
+        args.remove('--check')
+    numWorlds = int(args[0]) if len(args) > 0 else 256
+    steps = int(args[1]) if len(args) > 1 else 1000
+    if check:
+        mismatches = checkVecGooseEnv(numWorlds, steps)
+        print('%d worlds x %d steps: %d steps played differently from GooseEnv' % (numWorlds, steps, mismatches))
+        sys.exit(1 if mismatches else 0)
+
+    rng = numpy.random.default_rng(0)
+    actions = rng.choice((MOVELEFT, MOVERIGHT, MOVEUP, MOVEDOWN), (steps, numWorlds))
+    for envClass in (VecGooseEnv, ApproxVecGooseEnv):
+        env = envClass(numWorlds)
+        env.reset(0)
+        finished = 0
+        startTime = time.perf_counter()
+        for step in range(steps):
+            observations, rewards, dones, info = env.step(actions[step])
+            finished += int(dones.sum())
+        elapsed = time.perf_counter() - startTime
+        print('%s: %d worlds x %d steps in %.2f seconds (%d steps per second, %d world steps per second, %d games finished)'
+              % (envClass.__name__, numWorlds, steps, elapsed, steps / elapsed, numWorlds * steps / elapsed, finished))
@@ -0,0 +1,366 @@
+# GOOSE EAT GOOSE - local multiplayer server
+# Owns the game worlds and lets players join them over local TCP or a Unix
+# socket. Each session is one SharedWorld (see sharedworld.py) that up to
+# MAXSEATS players play in together; one server process runs any number of
+# sessions, all stepped from the same asyncio loop FPS times a second.
+#
+# Usage: python gooseserver.py [--port 4455 | --unix PATH] [--variant goose] [--seed N]
+# and then "python gooseeatgoose.py --connect 4455" (or --connect PATH) for
+# each player, with "--session N" to join a session other than 0.
+#
+# The protocol is as small as it can be. A client sends HELLO (MAGIC and
+# the session number) and after that just one byte of MOVE flags whenever
+# its keys change; the last byte the server has received is used for each
+# tick (any other bits in it are ignored). Every tick the server sends each client a snapshot of what its
+# camera sees, prefixed with its length (see makeSnapshot()).
+
+import os, sys, time, socket, struct, asyncio, argparse
+import numpy, pygame
+from gooseworld import *
+from sharedworld import SharedWorld
+from profiles import getProfile
+from frameprofiler import RollingHistogram
+
+DEFAULTPORT = 4455
+MAXSEATS = 16                  # most players in one session
+SENDBUFFERLIMIT = 64 * 1024    # a client with this many bytes still unsent skips snapshots until it catches up
+STATSTICKS = 10 * FPS          # how many ticks of timings the server keeps for stats()
+
+MAGIC = b'GOOS'
+MOVEFLAGS = MOVELEFT | MOVERIGHT | MOVEUP | MOVEDOWN # the bits of an inputs byte that mean anything
+HELLO = struct.Struct('<4sH')  # MAGIC, session number
+LENGTH = struct.Struct('<I')   # in front of every snapshot
+
+# A snapshot is SNAPSHOTHEADER followed by one int16 array per kind of
+# object the camera can see, with the columns below. Positions are relative
+# to the camera, so they always fit in 16 bits.
+#   header - tick, the client's seatId, camerax, cameray, SNAPSHOT* flags,
+#            health, then how many players, grass, poop, tools and geese follow
+SNAPSHOTHEADER = struct.Struct('<IHiiBBHHHHH')
+PLAYERCOLUMNS = ('seatId', 'x', 'y', 'size', 'flags') # flags are PLAYERRIGHT and PLAYERINVULNERABLE
+GRASSCOLUMNS = ('x', 'y', 'grassImage')
+PICKUPCOLUMNS = ('x', 'y')
+GOOSECOLUMNS = ('x', 'top', 'width', 'height', 'facing')
+SNAPSHOTINVULNERABLE = 1
+SNAPSHOTGAMEOVER = 2
+SNAPSHOTWIN = 4
+PLAYERRIGHT = 1        # the player is facing RIGHT
+PLAYERINVULNERABLE = 2 # the player was just hit (and flashes)
+
+
+class Snapshot:
+    # A snapshot as a client sees it, from parseSnapshot(). The object
+    # arrays are int16 with one row per object.
+    __slots__ = ('tick', 'seatId', 'camerax', 'cameray', 'invulnerableMode', 'gameOverMode', 'winMode',
+                 'health', 'players', 'grass', 'poop', 'tool', 'geese')
+
+
+class SnapshotReader:
+    # Splits the bytes coming from the server back into snapshots, however
+    # they were broken up on the way.
+
+    def __init__(self):
+        self.buffer = bytearray()
+
+
+    def feed(self, data):
+        # Returns the payloads of the snapshots that data completes.
+        buffer = self.buffer
+        buffer += data
+        snapshots = []
+        start = 0
+        while len(buffer) - start >= LENGTH.size:
+            length, = LENGTH.unpack_from(buffer, start)
+            end = start + LENGTH.size + length
+            if len(buffer) < end:
+                break
+            snapshots.append(bytes(buffer[start + LENGTH.size:end]))
+            start = end
+        del buffer[:start]
+        return snapshots
+
+
+def makeSnapshot(world, seat):
+    # Everything seat's camera can see in world, as bytes.
+    camerax = seat.camerax
+    cameray = seat.cameray
+    viewRect = pygame.Rect(camerax, cameray, WINWIDTH, WINHEIGHT)
+
+    players = []
+    for other in world.seats.values():
+        playerObj = other.playerObj
+        if not other.gameOverMode and viewRect.colliderect(playerObj.rect):
+            players.append((other.seatId, playerObj.rect.x - camerax, playerObj.rect.y - cameray, playerObj.size,
+                            (playerObj.facing == RIGHT and PLAYERRIGHT) | (other.invulnerableMode and PLAYERINVULNERABLE)))
+
+    # only the objects in the cells the camera overlaps can be on screen
+    grass = []
+    poop = []
+    tool = []
+    gooseIds = []
+    objectsByKey = world.objectsByKey
+    for key in sorted(world.spatialHash.query(camerax, cameray, WINWIDTH, WINHEIGHT)):
+        if key[0] == GOOSE:
+            gooseIds.append(key[1])
+            continue
+        obj = objectsByKey[key]
+        if not viewRect.colliderect(obj.rect):
+            continue
+        if key[0] == GRASS:
+            grass.append((obj.x - camerax, obj.y - cameray, obj.grassImage))
+        elif key[0] == POOP:
+            poop.append((obj.x - camerax, obj.y - cameray))
+        else:
+            tool.append((obj.x - camerax, obj.y - cameray))
+
+    geese = world.geese
+    onScreen = geese.collide(viewRect, geese.findIds(gooseIds))
+    gooseRows = numpy.column_stack((geese.x[onScreen] - camerax, geese.top[onScreen] - cameray, geese.width[onScreen],
+                                    geese.height[onScreen], geese.facing[onScreen]))
+
+    flags = ((seat.invulnerableMode and SNAPSHOTINVULNERABLE) | (seat.gameOverMode and SNAPSHOTGAMEOVER) |
+             (seat.winMode and SNAPSHOTWIN))
+    header = SNAPSHOTHEADER.pack(world.tickCount, seat.seatId, camerax, cameray, flags, seat.playerObj.health,
+                                 len(players), len(grass), len(poop), len(tool), len(onScreen))
+    return b''.join((header, numpy.array(players, dtype=numpy.int16).tobytes(),
+                     numpy.array(grass, dtype=numpy.int16).tobytes(),
+                     numpy.array(poop, dtype=numpy.int16).tobytes(),
+                     numpy.array(tool, dtype=numpy.int16).tobytes(),
+                     gooseRows.astype(numpy.int16).tobytes()))
+
+
+def parseSnapshot(data):
+    # the Snapshot in bytes from makeSnapshot()
+    snapshot = Snapshot()
+    (snapshot.tick, snapshot.seatId, snapshot.camerax, snapshot.cameray, flags, snapshot.health,
+     numPlayers, numGrass, numPoop, numTool, numGeese) = SNAPSHOTHEADER.unpack_from(data)
+    snapshot.invulnerableMode = bool(flags & SNAPSHOTINVULNERABLE)
+    snapshot.gameOverMode = bool(flags & SNAPSHOTGAMEOVER)
+    snapshot.winMode = bool(flags & SNAPSHOTWIN)
+    offset = SNAPSHOTHEADER.size
+    for name, count, columns in (('players', numPlayers, PLAYERCOLUMNS), ('grass', numGrass, GRASSCOLUMNS),
+                                 ('poop', numPoop, PICKUPCOLUMNS), ('tool', numTool, PICKUPCOLUMNS),
+                                 ('geese', numGeese, GOOSECOLUMNS)):
+        rows = numpy.frombuffer(data, dtype=numpy.int16, count=count * len(columns), offset=offset)
+        setattr(snapshot, name, rows.reshape(count, len(columns)))
+        offset += rows.nbytes
+    return snapshot
+
+
+def getAddress(text):
+    # Returns (host, port, path) for a --connect or --unix address: a path
+    # if it has a slash in it, otherwise a port or host:port.
+    if '/' in text:
+        return (None, None, text)
+    host, _, port = text.rpartition(':')
+    return (host or '127.0.0.1', int(port), None)
+
+
+class Client:
+    # one connected player
+    __slots__ = ('session', 'seat', 'writer', 'inputs', 'bytesSent', 'snapshotsSent', 'snapshotsSkipped')
+
+    def __init__(self, session, seat, writer):
+        self.session = session
+        self.seat = seat
+        self.writer = writer
+        self.inputs = 0 # the MOVE flags the client last sent
+        self.bytesSent = 0
+        self.snapshotsSent = 0
+        self.snapshotsSkipped = 0
+
+
+class Session:
+    # one SharedWorld and the clients playing in it
+    __slots__ = ('number', 'world', 'clients')
+
+    def __init__(self, number, world):
+        self.number = number
+        self.world = world
+        self.clients = []
+
+
+class GooseServer:
+    # listen() for clients, then run() the tick loop. Sessions are started
+    # when the first player asks to join them and dropped when the last one
+    # leaves. If seed is given, session number n is always seeded seed + n.
+
+    def __init__(self, profile=DEFAULTPROFILE, seed=None, maxSeats=MAXSEATS, statsTicks=STATSTICKS):
+        self.profile = profile
+        self.seed = seed
+        self.maxSeats = maxSeats
+        self.sessions = {} # session number -> Session
+        self.clients = []
+        self.server = None
+        self.statsTicks = statsTicks
+        self.resetStats()
+
+
+    def resetStats(self):
+        self.ticks = 0
+        self.lateTicks = 0  # ticks that started after the next one was due
+        self.tickWork = RollingHistogram(self.statsTicks)    # nanoseconds stepping the worlds and sending the snapshots
+        self.tickLatency = RollingHistogram(self.statsTicks) # nanoseconds from when a tick was due to its snapshots being sent
+        self.stepTime = 0
+        self.snapshotTime = 0
+        for client in self.clients:
+            client.bytesSent = client.snapshotsSent = client.snapshotsSkipped = 0
+
+
+    async def listen(self, port=DEFAULTPORT, host='127.0.0.1', path=None):
+        # start accepting clients, on a Unix socket if path is given and on TCP otherwise
+        if path is not None:
+            if os.path.exists(path):
+                os.remove(path) # left over from a server that didn't shut down cleanly
+            self.server = await asyncio.start_unix_server(self.handleClient, path)
+        else:
+            self.server = await asyncio.start_server(self.handleClient, host, port)
+
+
+    async def handleClient(self, reader, writer):
+        try:
+            magic, sessionNumber = HELLO.unpack(await reader.readexactly(HELLO.size))
+        except (asyncio.IncompleteReadError, ConnectionError):
+            writer.close()
+            return
+        session = self.sessions.get(sessionNumber)
+        if magic != MAGIC or (session is not None and len(session.world.seats) >= self.maxSeats):
+            writer.close()
+            return
+        if session is None:
+            seed = None if self.seed is None else self.seed + sessionNumber
+            session = self.sessions[sessionNumber] = Session(sessionNumber, SharedWorld(seed=seed, profile=self.profile))
+
+        client = Client(session, session.world.addSeat(), writer)
+        session.clients.append(client)
+        self.clients.append(client)
+        try:
+            while True:
+                data = await reader.read(256)
+                if not data:
+                    break
+                client.inputs = data[-1] & MOVEFLAGS # only the latest inputs matter
+        except ConnectionError:
+            pass
+        finally:
+            self.clients.remove(client)
+            session.clients.remove(client)
+            session.world.removeSeat(client.seat.seatId)
+            if not session.clients:
+                del self.sessions[sessionNumber]
+            writer.close()
+
+
+    async def run(self, ticks=None, tickRate=FPS):
+        # Step every session tickRate times a second, for ticks ticks (or
+        # forever). A tick that is late doesn't make the next ones hurry to
+        # catch up; it is just counted in lateTicks.
+        loop = asyncio.get_running_loop()
+        tickTime = 1.0 / tickRate
+        nextTick = loop.time()
+        while ticks is None or self.ticks < ticks:
+            nextTick += tickTime
+            delay = nextTick - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            else:
+                self.lateTicks += 1
+                nextTick = loop.time()
+                await asyncio.sleep(0) # let the clients' inputs in
+            self.tick(time.perf_counter_ns() - int((loop.time() - nextTick) * 1e9))
+
+
+    def tick(self, dueTime=None):
+        # step every session once and send each client its snapshot
+        perf = time.perf_counter_ns
+        start = perf()
+        for session in list(self.sessions.values()):
+            session.world.step(dict((client.seat.seatId, client.inputs) for client in session.clients))
+        afterStep = perf()
+        for client in self.clients:
+            if client.writer.transport.get_write_buffer_size() > SENDBUFFERLIMIT:
+                client.snapshotsSkipped += 1 # the client isn't keeping up; don't queue up more for it
+                continue
+            snapshot = makeSnapshot(client.session.world, client.seat)
+            client.writer.write(LENGTH.pack(len(snapshot)) + snapshot)
+            client.bytesSent += LENGTH.size + len(snapshot)
+            client.snapshotsSent += 1
+        end = perf()
+        self.ticks += 1
+        self.stepTime += afterStep - start
+        self.snapshotTime += end - afterStep
+        self.tickWork.add(end - start)
+        self.tickLatency.add(end - (start if dueTime is None else dueTime))
+
+
+    async def close(self):
+        # stop listening and disconnect everyone
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        for client in list(self.clients):
+            client.writer.close()
+
+
+    def stats(self):
+        # Returns the tick timings (in milliseconds, over the last
+        # statsTicks ticks) and what has been sent to the clients, as a dict.
+        stats = {'ticks': self.ticks, 'lateTicks': self.lateTicks,
+                 'sessions': len(self.sessions), 'clients': len(self.clients),
+                 'stepMs': round(self.stepTime / 1e6 / max(1, self.ticks), 4),
+                 'snapshotMs': round(self.snapshotTime / 1e6 / max(1, self.ticks), 4)}
+        for name, history in (('tickWork', self.tickWork), ('tickLatency', self.tickLatency)):
+            stats[name] = dict(('p%d' % percentile, round(history.getPercentile(percentile) / 1e6, 4))
+                               for percentile in (50, 95, 99))
+        stats['bytesSent'] = sum(client.bytesSent for client in self.clients)
+        stats['snapshotsSent'] = sum(client.snapshotsSent for client in self.clients)
+        stats['snapshotsSkipped'] = sum(client.snapshotsSkipped for client in self.clients)
+        return stats
+
+
+async def openConnection(address, sessionNumber=0):
+    # Connect to a server at address (a getAddress() string) and join a
+    # session. Returns the asyncio (reader, writer).
+    host, port, path = getAddress(address)
+    if path is not None:
+        reader, writer = await asyncio.open_unix_connection(path)
+    else:
+        reader, writer = await asyncio.open_connection(host, port)
+    writer.write(HELLO.pack(MAGIC, sessionNumber))
+    return reader, writer
+
+
+def connectSocket(address, sessionNumber=0):
+    # openConnection() for a plain (blocking) socket
+    host, port, path = getAddress(address)
+    if path is not None:
+        sock = socket.socket(socket.AF_UNIX)
+        sock.connect(path)
+    else:
+        sock = socket.create_connection((host, port))
+    sock.sendall(HELLO.pack(MAGIC, sessionNumber))
+    return sock
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Local multiplayer server for the goose game.')
+    parser.add_argument('--port', type=int, default=DEFAULTPORT, help='TCP port to listen on (on 127.0.0.1)')
+    parser.add_argument('--unix', help='listen on this Unix socket instead of TCP')
+    parser.add_argument('--variant', default='goose', help='the game to play')
+    parser.add_argument('--seed', type=int, help='seed for session 0 (session n gets seed + n)')
+    args = parser.parse_args()
+
+    server = GooseServer(getProfile(args.variant), args.seed)
+
+    async def serve():
+        await server.listen(args.port, path=args.unix)
+        print('serving %s on %s' % (args.variant, args.unix or args.port), file=sys.stderr)
+        await server.run()
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
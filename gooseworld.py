@@ -0,0 +1,900 @@
+# GOOSE EAT GOOSE - simulation engine
+# The game world without any display. runGame() in gooseeatgoose.py draws it,
+# but a World can also be stepped on its own as fast as the CPU allows.
+
+import random, math, hashlib, pygame
+import numpy
+from spatialhash import SpatialHash
+from frameprofiler import NOPROFILER
+from worldchunks import ChunkStore, ChunkRecord, WORLDCHUNKSIZE, GOOSECOLUMNS
+
+FPS = 30 # simulation ticks per second (movement is per tick, and the timers below are counted in ticks)
+WINWIDTH = 640 # width of the program's window, in pixels
+WINHEIGHT = 480 # height in pixels
+HALF_WINWIDTH = int(WINWIDTH / 2)
+HALF_WINHEIGHT = int(WINHEIGHT / 2)
+
+CAMERASLACK = 90     # how far from the center the squirrel moves before moving the camera
+MOVERATE = 9         # how fast the player moves
+BOUNCERATE = 6       # how fast the player bounces (large is slower)
+BOUNCEHEIGHT = 30    # how high the player bounces
+STARTSIZE = 30       # how big the player starts off
+WINSIZE = 500        # how big the player needs to be to win
+MAXSIZE = 600        # how big the player gets before the game restarts
+INVULNTIME = 2       # how long the player is invulnerable after being hit in seconds
+GAMEOVERTIME = 4     # how long the "game over" text stays on the screen in seconds
+MAXHEALTH = 3        # how much health the player starts with
+
+NUMGRASS = 80    # number of grass objects in the active area
+NUMGEESE = 27    # number of geese in the active area
+NUMPOOP = 5      # number of poop objects in the active area
+NUMTOOL = 2      # number of tool objects in the active area
+GOOSEMINSPEED = 3 # slowest goose speed
+GOOSEMAXSPEED = 7 # fastest goose speed
+DIRCHANGEFREQ = 2    # % chance of direction change per frame
+GOOSESIZE = (5, 50)  # smallest and largest general size of a new goose
+GOOSESIZESPREAD = 15 # how much wider and taller than its general size a goose can be
+GOOSESIZEMULTIPLIER = (1, 4) # smallest and largest number the size is then multiplied by
+GOOSEBOUNCERATE = (10, 18)   # smallest and largest goose bounce rate
+GOOSEBOUNCEHEIGHT = (10, 50) # smallest and largest goose bounce height
+LEFT = 'left'
+RIGHT = 'right'
+
+NUMGRASSIMAGES = 4        # grass1.png to grass4.png
+GRASSSIZE = (80, 80)      # width and height of the grass images, in pixels
+POOPSIZE = (60, 30)       # width and height of goosepoop.png
+TOOLSIZE = (30, 50)       # width and height of tool.png
+
+CELLSIZE = 80 # size of a spatial hash cell, about the size of a typical goose or grass image
+
+# kinds of object, used in the spatial hash keys
+GOOSE = 'goose'
+GRASS = 'grass'
+POOP = 'poop'
+TOOL = 'tool'
+
+# bit flags for the player input passed to World.step()
+MOVELEFT = 1
+MOVERIGHT = 2
+MOVEUP = 4
+MOVEDOWN = 8
+
+# The player, grass, poop and tools are objects of the classes below. The
+# enemy geese are kept in a GooseStore instead (one NumPy array per Goose
+# attribute), and a Goose is only used to fill in a new goose before it is
+# copied into the store. Every class has __slots__, so each object is small
+# and has all of its attributes from the start.
+
+class Entity:
+    # What grass, poop and tools have in common.
+    #   id - a number identifying the object, unique within its World (the spatial hash key is (kind, id)).
+    #   x, y - the left and top edge of the object in the game world (not a pixel coordinate on the screen)
+    #   width, height - the size of the object's image, in pixels
+    #   rect - the pygame.Rect of where in the game world the object is
+    __slots__ = ('id', 'x', 'y', 'width', 'height', 'rect')
+
+    def __init__(self, width=0, height=0):
+        self.id = None
+        self.x = 0
+        self.y = 0
+        self.width = width
+        self.height = height
+        self.rect = pygame.Rect(0, 0, width, height)
+
+
+class Grass(Entity):
+    #   grassImage - the index of this grass object's image in GRASSIMAGES
+    __slots__ = ('grassImage',)
+
+    def __init__(self):
+        Entity.__init__(self, *GRASSSIZE)
+        self.grassImage = 0
+
+
+class Poop(Entity):
+    __slots__ = ()
+
+    def __init__(self):
+        Entity.__init__(self, *POOPSIZE)
+
+
+class Tool(Entity):
+    __slots__ = ()
+
+    def __init__(self):
+        Entity.__init__(self, *TOOLSIZE)
+
+
+class Player:
+    #   x, y - the left and top edge of the player in the game world
+    #   rect - where the player is in the game world (including the bounce offset)
+    #   surface - the image of the goose to draw (None unless the World has a makeSurface function)
+    #   facing - either LEFT or RIGHT
+    #   size - the width and height of the player in pixels (the width & height are always the same)
+    #   bounce - at what point in a bounce the player is. 0 means standing (no bounce), up to BOUNCERATE (the completion of the bounce)
+    #   health - how many more times the player can be hit by a larger goose before dying
+    __slots__ = ('x', 'y', 'rect', 'surface', 'facing', 'size', 'bounce', 'health')
+
+    def __init__(self, x, y, size):
+        self.x = x
+        self.y = y
+        self.rect = pygame.Rect(x, y, size, size)
+        self.surface = None
+        self.facing = LEFT
+        self.size = size
+        self.bounce = 0
+        self.health = MAXHEALTH
+
+
+FACINGS = (LEFT, RIGHT) # GooseStore.facing values index into this
+
+
+class Profile:
+    # One variant of the game: the rules a World plays by (sizes, how many
+    # of everything there are and which pickups exist) and the things a
+    # renderer needs to show it (the window caption, the player image and
+    # the text for winning). The defaults are Goose Eat Goose. The variants
+    # themselves are in profiles.py.
+    #
+    # maxSize is how big the player gets before the game restarts, or None
+    # if it carries on until the player presses "r". pickups holds POOP
+    # and/or TOOL. With hitShrink, a goose that hurts the player also
+    # shrinks it by as much as eating that goose would have grown it.
+
+    def __init__(self, name='goose', caption='Goose Eat Goose', playerImage='gooseimg.png',
+                 winText=('You have achieved', 'ULTIMATE UWATERLOO GOOSE!', '(Press "r" to restart.)'),
+                 startSize=STARTSIZE, winSize=WINSIZE, maxSize=MAXSIZE,
+                 numGrass=NUMGRASS, numGeese=NUMGEESE, numPoop=NUMPOOP, numTool=NUMTOOL, pickups=(POOP, TOOL),
+                 gooseSize=GOOSESIZE, gooseSizeSpread=GOOSESIZESPREAD, gooseSizeMultiplier=GOOSESIZEMULTIPLIER,
+                 hitShrink=False):
+        self.name = name
+        self.caption = caption
+        self.playerImage = playerImage
+        self.winText = winText
+        self.startSize = startSize
+        self.winSize = winSize
+        self.maxSize = maxSize
+        self.numGrass = numGrass
+        self.numGeese = numGeese
+        self.numPoop = numPoop if POOP in pickups else 0
+        self.numTool = numTool if TOOL in pickups else 0
+        self.pickups = pickups
+        self.gooseSize = gooseSize
+        self.gooseSizeSpread = gooseSizeSpread
+        self.gooseSizeMultiplier = gooseSizeMultiplier
+        self.hitShrink = hitShrink
+
+
+    def replace(self, **changes):
+        # a copy of this profile with some settings changed
+        settings = dict(vars(self))
+        settings.update(changes)
+        return Profile(**settings)
+
+
+DEFAULTPROFILE = Profile()
+
+
+class World:
+    # Owns everything in one game: the player, the geese, grass, poop and
+    # tools, and the camera. step() advances the game by one tick and never
+    # touches the display, so it can run headless.
+    #
+    # makeSurface is an optional function (facing, width, height) -> Surface
+    # that the renderer passes in. When given, the world asks it for a new
+    # goose image whenever the player changes facing or size. The other
+    # geese don't hold images; the renderer looks each one up by its facing
+    # and size as it draws them, so that the images of the geese it isn't
+    # drawing can be let go.
+    #
+    # All the randomness in a world comes from its own random number
+    # generators, made from seed (a random one is picked if it isn't given).
+    # Two worlds with the same seed that are stepped with the same inputs
+    # end up exactly the same, which getChecksum() can confirm.
+    #
+    # profiler is a FrameProfiler that step() marks its phases on, and
+    # profile is the Profile of the variant being played.
+
+    def __init__(self, makeSurface=None, seed=None, profiler=NOPROFILER, profile=DEFAULTPROFILE):
+        self.makeSurface = makeSurface
+        self.profiler = profiler
+        self.profile = profile
+        if seed is None:
+            seed = random.randrange(2**32)
+        self.seed = seed
+        self.random = random.Random(seed)              # for one thing at a time
+        self.arrayRandom = numpy.random.default_rng(seed) # for all the geese at once
+
+        self.invulnerableMode = False  # if the player is invulnerable
+        self.invulnerableTicks = 0     # ticks left until the player is vulnerable again
+        self.gameOverMode = False      # if the player has lost
+        self.gameOverTicks = 0         # ticks left until the game restarts
+        self.winMode = False           # if the player has won
+        self.done = False              # if this game is finished and a new one should start
+        self.tickCount = 0             # how many times step() has been called
+
+        # camerax and cameray are the top left of where the camera view is
+        self.camerax = 0
+        self.cameray = 0
+        # where the camera and player were before the last step(), so that a
+        # renderer can draw them part of the way between two ticks
+        self.prevCamerax = 0
+        self.prevCameray = 0
+
+        self.grassObjs = []    # stores all the grass objects in the loaded chunks
+        self.geese = GooseStore() # stores all the non-player geese in the loaded chunks
+        self.poopObjs = []     # stores all the poop objects in the loaded chunks
+        self.toolObjs = []     # stores all the tool objects in the loaded chunks
+
+        # everything else is packed away in the chunks that aren't loaded
+        self.chunks = ChunkStore(self.generateChunk)
+        self.chunkRanges = () # the ranges of chunks that are loaded, from getChunkRanges()
+
+        # every object is also in the spatial hash, under the key (kind, id)
+        self.spatialHash = SpatialHash(CELLSIZE)
+        self.objectsByKey = {} # (kind, id) -> grass, poop or tool object
+        self.nextId = 0
+        self.grassChanges = 0  # goes up whenever grass is added or removed, so a renderer can cache the grass
+
+        # Removed grass, poop and tool objects wait here to be filled in
+        # again (Rect and all) when the next one of their kind is loaded, so
+        # loading chunks doesn't keep making new objects for the garbage
+        # collector to deal with. (Geese go straight into the GooseStore's
+        # arrays.)
+        self.pools = {GRASS: [], POOP: [], TOOL: []}
+
+        # stores the player object:
+        self.playerObj = Player(HALF_WINWIDTH, HALF_WINHEIGHT, profile.startSize)
+        self.prevPlayerPos = self.playerObj.rect.topleft
+        self.resizePlayer()
+
+        # load the chunks around the camera, but don't start with a goose on
+        # the screen (new chunks are always loaded off screen after this)
+        self.updateChunks()
+        geese = self.geese
+        for gooseId in geese.remove(geese.collide(pygame.Rect(self.camerax, self.cameray, WINWIDTH, WINHEIGHT))).tolist():
+            self.spatialHash.remove((GOOSE, gooseId))
+
+
+    def step(self, inputs=0):
+        # Advance the game by one tick. inputs is a combination of the
+        # MOVELEFT, MOVERIGHT, MOVEUP and MOVEDOWN flags.
+        self.tickCount += 1
+        self.prevCamerax = self.camerax
+        self.prevCameray = self.cameray
+        self.prevPlayerPos = self.playerObj.rect.topleft
+        mark = self.profiler.mark
+        self.updateTimers()
+        self.moveGeese()
+        mark('goose moves')
+        self.updateChunks()
+        mark('chunks')
+        self.updateCamera()
+        mark('camera')
+        if not self.gameOverMode:
+            self.movePlayer(inputs)
+            self.checkCollisions()
+        mark('collisions')
+
+
+    def updateTimers(self):
+        # check if we should turn off invulnerability
+        if self.invulnerableMode:
+            self.invulnerableTicks -= 1
+            if self.invulnerableTicks <= 0:
+                self.invulnerableMode = False
+
+        # end the current game once the "game over" text has been shown
+        if self.gameOverMode:
+            self.gameOverTicks -= 1
+            if self.gameOverTicks <= 0:
+                self.done = True
+
+
+    def moveGeese(self):
+        geese = self.geese
+        geese.move(self.arrayRandom)
+
+        # only the geese that crossed into other cells need rehashing
+        for i in geese.updateCells(CELLSIZE).tolist():
+            self.spatialHash.move((GOOSE, int(geese.id[i])), geese.getCell(i))
+
+
+    def updateChunks(self):
+        # Keep the chunks that overlap the active area loaded. Geese that
+        # wander off the loaded chunks are packed into the chunk they went
+        # to, and when the camera moves far enough for the loaded chunks to
+        # change, the chunks left behind are unloaded and the new ones loaded.
+        chunks = self.chunks
+        chunkSize = chunks.chunkSize
+        chunkRanges = self.getChunkRanges()
+        changed = chunkRanges != self.chunkRanges
+        if changed:
+            wanted = set()
+            for chunkRange in chunkRanges:
+                wanted.update(getChunks(chunkRange))
+            unloaded = sorted(chunks.loaded - wanted, key=getChunkOrder)
+            newChunks = sorted(wanted - chunks.loaded, key=getChunkOrder)
+            self.chunkRanges = chunkRanges
+
+            # pack up the grass, poop and tools in the chunks being unloaded
+            records = dict((chunk, ([], [], [])) for chunk in unloaded)
+            for column, (kind, objs) in enumerate(((GRASS, self.grassObjs), (POOP, self.poopObjs), (TOOL, self.toolObjs))):
+                removed = removeOutsideChunks(objs, wanted, chunkSize)
+                for obj in removed:
+                    chunk = (obj.x // chunkSize, obj.y // chunkSize)
+                    row = [obj.x - chunk[0] * chunkSize, obj.y - chunk[1] * chunkSize]
+                    if kind == GRASS:
+                        row.append(obj.grassImage)
+                    records[chunk][column].append(row)
+                    key = (kind, obj.id)
+                    del self.objectsByKey[key]
+                    self.spatialHash.remove(key)
+                    if kind == GRASS:
+                        self.grassChanges += 1
+                self.pools[kind].extend(removed)
+            for chunk in unloaded:
+                grass, poop, tool = records[chunk]
+                chunks.put(chunk, ChunkRecord(grass, poop, tool, ()))
+
+        # pack up the geese that are outside the loaded chunks
+        geese = self.geese
+        outside = numpy.flatnonzero(~getInChunkRanges(geese.x, geese.y, chunkRanges, chunkSize))
+        if len(outside):
+            rows = numpy.stack([getattr(geese, name)[outside] for name in GOOSECOLUMNS], axis=1)
+            for gooseId in geese.remove(outside).tolist():
+                self.spatialHash.remove((GOOSE, gooseId))
+            chunkxs = rows[:, 0] // chunkSize
+            chunkys = rows[:, 1] // chunkSize
+            rows[:, 0] -= chunkxs * chunkSize
+            rows[:, 1] -= chunkys * chunkSize
+            for chunk in sorted(set(zip(chunkxs.tolist(), chunkys.tolist()))):
+                chunks.addGeese(chunk, rows[(chunkxs == chunk[0]) & (chunkys == chunk[1])])
+
+        if changed:
+            # load the chunks that have come into range
+            for chunk in newChunks:
+                self.loadChunk(chunk)
+
+
+    def getChunkRanges(self):
+        # The ranges of chunks (see ChunkStore.getChunkRange()) that should
+        # be loaded, as a tuple: just the ones around the camera.
+        return (self.chunks.getChunkRange(*getActiveArea(self.camerax, self.cameray)),)
+
+
+    def loadChunk(self, chunk):
+        # turn a chunk's record back into objects in the World
+        record = self.chunks.take(chunk)
+        chunkx = chunk[0] * self.chunks.chunkSize
+        chunky = chunk[1] * self.chunks.chunkSize
+        for x, y, grassImage in record.grass.tolist():
+            gObj = self.takeObject(GRASS)
+            gObj.grassImage = grassImage
+            self.placeObject(gObj, chunkx + x, chunky + y)
+            self.addObject(GRASS, gObj, self.grassObjs)
+        for kind, rows, objs in ((POOP, record.poop, self.poopObjs), (TOOL, record.tool, self.toolObjs)):
+            for x, y in rows.tolist():
+                obj = self.takeObject(kind)
+                self.placeObject(obj, chunkx + x, chunky + y)
+                self.addObject(kind, obj, objs)
+        if len(record.geese):
+            rows = record.geese.astype(numpy.int64)
+            newGeese = dict((name, rows[:, column]) for column, name in enumerate(GOOSECOLUMNS))
+            newGeese['x'] += chunkx
+            newGeese['y'] += chunky
+            self.addGeese(newGeese)
+
+
+    def generateChunk(self, chunkx, chunky):
+        # What is in a chunk the first time it is loaded. It is made with
+        # its own random number generator, seeded from the World's seed and
+        # the chunk's coordinates, so it doesn't matter when (or if) any
+        # other chunk was made first. There are as many of everything per
+        # pixel on average as the profile has in the active area.
+        rng = numpy.random.default_rng([self.seed, getNatural(chunkx), getNatural(chunky)])
+        profile = self.profile
+        chunkSize = self.chunks.chunkSize
+        share = chunkSize ** 2 / (9 * WINWIDTH * WINHEIGHT) # how much of the active area a chunk is
+        numGrass, numPoop, numTool, numGeese = rng.poisson(numpy.array(
+            (profile.numGrass, profile.numPoop, profile.numTool, profile.numGeese)) * share).tolist()
+        grass = numpy.column_stack((rng.integers(0, chunkSize, (numGrass, 2)), rng.integers(0, NUMGRASSIMAGES, numGrass)))
+        poop = rng.integers(0, chunkSize, (numPoop, 2))
+        tool = rng.integers(0, chunkSize, (numTool, 2))
+        newGeese = makeNewGooseFields(numGeese, rng, profile)
+        newGeese['x'] = rng.integers(0, chunkSize, numGeese)
+        newGeese['y'] = rng.integers(0, chunkSize, numGeese)
+        geese = numpy.column_stack([newGeese[name] for name in GOOSECOLUMNS])
+        return ChunkRecord(grass, poop, tool, geese)
+
+
+    def takeObject(self, kind):
+        # a grass, poop or tool object to fill in, reused from the pool if there is one
+        pool = self.pools[kind]
+        return pool.pop() if pool else OBJECTCLASSES[kind]()
+
+
+    def placeObject(self, obj, x, y):
+        obj.x = x
+        obj.y = y
+        obj.rect.update(x, y, obj.width, obj.height)
+
+
+    def addGeese(self, newGeese):
+        # add a dict of goose arrays (as made by makeNewGeese) to the GooseStore and the spatial hash
+        geese = self.geese
+        start = geese.count
+        geese.extend(newGeese, self.nextId, CELLSIZE)
+        self.nextId += geese.count - start
+        for i in range(start, geese.count):
+            self.spatialHash.insert((GOOSE, int(geese.id[i])), geese.getCell(i), int(geese.width[i]), int(geese.height[i] + geese.bounceheight[i]))
+
+
+    def addObject(self, kind, obj, objs):
+        # add a grass, poop or tool object to its list and the spatial hash
+        obj.id = self.nextId
+        self.nextId += 1
+        objs.append(obj)
+        key = (kind, obj.id)
+        self.objectsByKey[key] = obj
+        self.spatialHash.insert(key, self.spatialHash.getCell(obj.x, obj.y), obj.width, obj.height)
+        if kind == GRASS:
+            self.grassChanges += 1
+
+
+    def removeObject(self, kind, obj, objs):
+        # remove a grass, poop or tool object from its list and the spatial
+        # hash, and put it in the pool to be reused
+        objs.remove(obj)
+        key = (kind, obj.id)
+        del self.objectsByKey[key]
+        self.spatialHash.remove(key)
+        if kind == GRASS:
+            self.grassChanges += 1
+        self.pools[kind].append(obj)
+
+
+    def updateCamera(self):
+        # adjust camerax and cameray if beyond the "camera slack"
+        playerObj = self.playerObj
+        playerCenterx = playerObj.x + int(playerObj.size / 2)
+        playerCentery = playerObj.y + int(playerObj.size / 2)
+        if (self.camerax + HALF_WINWIDTH) - playerCenterx > CAMERASLACK:
+            self.camerax = playerCenterx + CAMERASLACK - HALF_WINWIDTH
+        elif playerCenterx - (self.camerax + HALF_WINWIDTH) > CAMERASLACK:
+            self.camerax = playerCenterx - CAMERASLACK - HALF_WINWIDTH
+        if (self.cameray + HALF_WINHEIGHT) - playerCentery > CAMERASLACK:
+            self.cameray = playerCentery + CAMERASLACK - HALF_WINHEIGHT
+        elif playerCentery - (self.cameray + HALF_WINHEIGHT) > CAMERASLACK:
+            self.cameray = playerCentery - CAMERASLACK - HALF_WINHEIGHT
+
+
+    def movePlayer(self, inputs):
+        playerObj = self.playerObj
+        if inputs & MOVELEFT and playerObj.facing != LEFT:
+            playerObj.facing = LEFT
+            self.resizePlayer() # change player image
+        elif inputs & MOVERIGHT and playerObj.facing != RIGHT:
+            playerObj.facing = RIGHT
+            self.resizePlayer() # change player image
+
+        # actually move the player
+        if inputs & MOVELEFT:
+            playerObj.x -= MOVERATE
+        if inputs & MOVERIGHT:
+            playerObj.x += MOVERATE
+        if inputs & MOVEUP:
+            playerObj.y -= MOVERATE
+        if inputs & MOVEDOWN:
+            playerObj.y += MOVERATE
+
+        if inputs or playerObj.bounce != 0:
+            playerObj.bounce += 1
+
+        if playerObj.bounce > BOUNCERATE:
+            playerObj.bounce = 0 # reset bounce amount
+
+        playerObj.rect.topleft = (playerObj.x, playerObj.y - getBounceAmount(playerObj.bounce, BOUNCERATE, BOUNCEHEIGHT))
+
+
+    def checkCollisions(self):
+        playerObj = self.playerObj
+        playerRect = playerObj.rect
+
+        # only the objects in the cells the player overlaps can be touching it
+        gooseIds = []
+        poopKeys = []
+        toolKeys = []
+        for key in self.spatialHash.query(playerRect.left, playerRect.top, playerRect.width, playerRect.height):
+            if key[0] == GOOSE:
+                gooseIds.append(key[1])
+            elif key[0] == POOP:
+                poopKeys.append(key)
+            elif key[0] == TOOL:
+                toolKeys.append(key)
+
+        # check if the player has collided with any geese
+        geese = self.geese
+        eaten = []
+        for i in geese.collide(playerRect, geese.findIds(gooseIds))[::-1].tolist():
+            # a player/goose collision has occurred
+            gooseArea = int(geese.width[i]) * int(geese.height[i])
+            if gooseArea <= playerObj.size**2:
+                # player is larger and eats the goose
+                eaten.append(i)
+                self.growPlayer(int( gooseArea**0.2 ) + 1)
+                if self.done:
+                    break
+
+            elif not self.invulnerableMode:
+                # player is smaller and takes damage
+                self.invulnerableMode = True
+                self.invulnerableTicks = INVULNTIME * FPS
+                playerObj.health -= 1
+                if self.profile.hitShrink:
+                    playerObj.size -= int( gooseArea**0.2 ) + 1
+                    self.resizePlayer()
+                if playerObj.health == 0:
+                    self.gameOverMode = True # turn on "game over mode"
+                    self.gameOverTicks = GAMEOVERTIME * FPS
+                    break
+        if eaten:
+            for gooseId in geese.remove(eaten).tolist():
+                self.spatialHash.remove((GOOSE, gooseId))
+        if self.done or self.gameOverMode:
+            return
+
+        # check if the player has collided with poop
+        for key in sorted(poopKeys):
+            pObj = self.objectsByKey[key]
+            if playerRect.colliderect(pObj.rect):
+                self.removeObject(POOP, pObj, self.poopObjs)
+                self.growPlayer(-3)
+
+        # check if the player has collided with any tools
+        for key in sorted(toolKeys):
+            tObj = self.objectsByKey[key]
+            if playerRect.colliderect(tObj.rect):
+                self.removeObject(TOOL, tObj, self.toolObjs)
+                self.growPlayer(20)
+                if self.done:
+                    return
+
+
+    def growPlayer(self, amount):
+        playerObj = self.playerObj
+        playerObj.size += amount
+        self.resizePlayer()
+        if playerObj.size > self.profile.winSize:
+            self.winMode = True # turn on "win mode"
+            if self.profile.maxSize is not None and playerObj.size >= self.profile.maxSize:
+                self.done = True
+
+
+    def resizePlayer(self):
+        playerObj = self.playerObj
+        playerObj.rect.size = (playerObj.size, playerObj.size)
+        if self.makeSurface is not None:
+            playerObj.surface = self.makeSurface(playerObj.facing, playerObj.size, playerObj.size)
+
+
+    def getChecksum(self):
+        # Returns a hex string that changes if anything in the game changes
+        # (except the images), for checking that two runs match exactly.
+        checksum = hashlib.sha1()
+        playerObj = self.playerObj
+        checksum.update(repr((self.tickCount, self.camerax, self.cameray,
+                              self.invulnerableMode, self.invulnerableTicks,
+                              self.gameOverMode, self.gameOverTicks, self.winMode, self.done,
+                              playerObj.x, playerObj.y, playerObj.size, playerObj.facing,
+                              playerObj.bounce, playerObj.health)).encode())
+        for objs in (self.grassObjs, self.poopObjs, self.toolObjs):
+            checksum.update(repr([(obj.id, obj.x, obj.y) for obj in objs]).encode())
+        for name in GooseStore.FIELDS:
+            if name not in ('top', 'prevtop'): # only for drawing, so they don't count
+                checksum.update(getattr(self.geese, name).tobytes())
+        checksum.update(repr(self.chunkRanges).encode())
+        for chunk in sorted(self.chunks.records):
+            record = self.chunks.records[chunk]
+            checksum.update(repr(chunk).encode())
+            for rows in (record.grass, record.poop, record.tool, record.geese):
+                checksum.update(rows.tobytes())
+        return checksum.hexdigest()
+
+
+class GooseStore:
+    # All the enemy geese, stored as one NumPy array per goose key instead
+    # of one object per goose, so that moving them takes a handful of array
+    # operations per tick no matter how many geese there are.
+    #
+    # Goose number i is x[i], y[i], movex[i] and so on, for i from 0 to
+    # count - 1. The arrays are views into bigger buffers so that adding
+    # geese doesn't usually reallocate anything.
+    #
+    # Each goose also has an id, which doesn't change when geese before it
+    # are removed (ids only ever increase, so the id array stays sorted),
+    # and the spatial hash cell the top left of its bouncing area is in.
+    # facing is 0 for LEFT and 1 for RIGHT (FACINGS[facing] gives the name)
+    # and top is the top edge of the goose after the bounce offset.
+    # prevx and prevtop are where it was drawn before the last move().
+    #
+    # top and prevtop are only for drawing: collide() works out the bounce
+    # for the geese it checks itself. With bouncing set to False, move()
+    # doesn't work out the bounce for every goose and top is just y (for a
+    # renderer that isn't drawing the bounce).
+
+    FIELDS = ('id', 'x', 'y', 'top', 'prevx', 'prevtop', 'movex', 'movey', 'width', 'height',
+              'bounce', 'bouncerate', 'bounceheight', 'facing',
+              'cellx', 'celly')
+
+    def __init__(self, capacity=64):
+        self.count = 0
+        self.bouncing = True
+        self.buffers = {}
+        for name in self.FIELDS:
+            self.buffers[name] = numpy.zeros(capacity, dtype=numpy.int64)
+        self.updateViews()
+
+
+    def updateViews(self):
+        # point x, y, ... at the first count entries of each buffer
+        for name in self.FIELDS:
+            setattr(self, name, self.buffers[name][:self.count])
+
+
+    def reserve(self, count):
+        # make sure the buffers have room for count geese, doubling their size until they do
+        capacity = len(self.buffers['x'])
+        if capacity >= count:
+            return
+        while capacity < count:
+            capacity *= 2
+        for name in self.FIELDS:
+            buffer = numpy.zeros(capacity, dtype=numpy.int64)
+            buffer[:self.count] = self.buffers[name][:self.count]
+            self.buffers[name] = buffer
+
+
+    def extend(self, newGeese, firstId, cellSize):
+        # Add a batch of geese, given as a dict of arrays (as made by
+        # makeNewGeese), numbering their ids from firstId.
+        start = self.count
+        end = start + len(newGeese['x'])
+        self.reserve(end)
+        buffers = self.buffers
+        for name in ('x', 'y', 'movex', 'movey', 'width', 'height', 'bounce', 'bouncerate', 'bounceheight'):
+            buffers[name][start:end] = newGeese[name]
+        buffers['prevx'][start:end] = newGeese['x']
+        buffers['top'][start:end] = newGeese['y']
+        buffers['prevtop'][start:end] = newGeese['y']
+        buffers['facing'][start:end] = newGeese['movex'] > 0
+        buffers['id'][start:end] = numpy.arange(firstId, firstId + end - start)
+        self.count = end
+        self.updateViews()
+        self.updateCells(cellSize, start)
+
+
+    def keep(self, mask):
+        # Remove every goose whose entry in the boolean array mask is False.
+        # Returns the ids of the removed geese.
+        kept = numpy.flatnonzero(mask)
+        if len(kept) == self.count:
+            return kept[:0]
+        removedIds = self.id[~mask]
+        for name in self.FIELDS:
+            self.buffers[name][:len(kept)] = self.buffers[name][kept]
+        self.count = len(kept)
+        self.updateViews()
+        return removedIds
+
+
+    def remove(self, indexes):
+        # remove the geese with these index numbers
+        mask = numpy.ones(self.count, dtype=bool)
+        mask[indexes] = False
+        return self.keep(mask)
+
+
+    def move(self, rng):
+        # Move all the geese, and adjust for their bounce. rng is the NumPy
+        # random Generator to roll with.
+        self.prevx[:] = self.x
+        self.prevtop[:] = self.top
+        self.x += self.movex
+        self.y += self.movey
+        self.bounce += 1
+        self.bounce[self.bounce > self.bouncerate] = 0 # reset bounce amount
+
+        # random chance they change direction
+        turned = numpy.flatnonzero(rng.integers(0, 100, self.count) < DIRCHANGEFREQ)
+        if len(turned):
+            self.movex[turned] = getRandomVelocities(len(turned), rng)
+            self.movey[turned] = getRandomVelocities(len(turned), rng)
+            self.facing[turned] = self.movex[turned] > 0
+
+        if self.bouncing:
+            self.top[:] = self.y - getBounceAmounts(self.bounce, self.bouncerate, self.bounceheight)
+        else:
+            self.top[:] = self.y
+
+
+    def updateCells(self, cellSize, start=0):
+        # Work out which spatial hash cell each goose (from number start on)
+        # is in, going by the top left of the whole area it can bounce
+        # through. Returns the index numbers of the geese that changed cell.
+        cellx = self.x[start:] // cellSize
+        celly = (self.y[start:] - self.bounceheight[start:]) // cellSize
+        changed = numpy.flatnonzero((cellx != self.cellx[start:]) | (celly != self.celly[start:]))
+        self.cellx[start:] = cellx
+        self.celly[start:] = celly
+        return changed + start
+
+
+    def getCell(self, i):
+        return (int(self.cellx[i]), int(self.celly[i]))
+
+
+    def findIds(self, gooseIds):
+        # Returns the index numbers of the geese with these ids, in
+        # increasing order. Every id must belong to a goose in the store.
+        return numpy.searchsorted(self.id, numpy.sort(numpy.array(gooseIds, dtype=numpy.int64)))
+
+
+    def collide(self, rect, indexes=None):
+        # Returns the index numbers (in increasing order) of the geese that
+        # overlap rect, the same test Rect.colliderect() does. If indexes is
+        # given, only those geese are checked.
+        if indexes is None:
+            indexes = numpy.arange(self.count)
+        x = self.x[indexes]
+        top = self.y[indexes] - getBounceAmounts(self.bounce[indexes], self.bouncerate[indexes], self.bounceheight[indexes])
+        return indexes[(x < rect.right) & (x + self.width[indexes] > rect.left) &
+                       (top < rect.bottom) & (top + self.height[indexes] > rect.top)]
+
+
+def makeBounceTable(maxRate, maxHeight):
+    # Every bounce offset for bounce rates and heights up to maxRate and
+    # maxHeight, so that bouncing is a lookup instead of a sin():
+    # table[bounceRate, currentBounce, bounceHeight] is the same as
+    # int(math.sin((math.pi / bounceRate) * currentBounce) * bounceHeight).
+    sines = numpy.zeros((maxRate + 1, maxRate + 1))
+    for rate in range(1, maxRate + 1):
+        for bounce in range(maxRate + 1):
+            sines[rate, bounce] = math.sin( (math.pi / float(rate)) * bounce )
+    return (sines[:, :, numpy.newaxis] * numpy.arange(maxHeight + 1)).astype(numpy.int64)
+
+MAXBOUNCERATE = max(BOUNCERATE, GOOSEBOUNCERATE[1])
+MAXBOUNCEHEIGHT = max(BOUNCEHEIGHT, GOOSEBOUNCEHEIGHT[1])
+BOUNCETABLE = makeBounceTable(MAXBOUNCERATE, MAXBOUNCEHEIGHT) # for arrays of geese
+BOUNCELISTS = BOUNCETABLE.tolist() # the same as nested lists, which are quicker to look up one at a time
+
+def getBounceAmount(currentBounce, bounceRate, bounceHeight):
+    # Returns the number of pixels to offset based on the bounce.
+    # Larger bounceRate means a slower bounce.
+    # Larger bounceHeight means a higher bounce.
+    # currentBounce will always be less than bounceRate
+    if bounceRate <= MAXBOUNCERATE and bounceHeight <= MAXBOUNCEHEIGHT:
+        return BOUNCELISTS[bounceRate][currentBounce][bounceHeight]
+    return int(math.sin( (math.pi / float(bounceRate)) * currentBounce ) * bounceHeight)
+
+def getBounceAmounts(currentBounce, bounceRate, bounceHeight):
+    # getBounceAmount() for whole arrays of geese at once. Every rate and
+    # height must be in BOUNCETABLE, as they are for geese from makeNewGeese().
+    return BOUNCETABLE[bounceRate, currentBounce, bounceHeight]
+
+def getRandomVelocities(count, rng):
+    # a random speed between GOOSEMINSPEED and GOOSEMAXSPEED, either way, for
+    # each of count geese, using the NumPy random Generator rng
+    speeds = rng.integers(GOOSEMINSPEED, GOOSEMAXSPEED + 1, count)
+    return numpy.where(rng.integers(0, 2, count) == 0, speeds, -speeds)
+
+
+# An object spawns with its top left somewhere from a window length left of
+# and above the camera view to two window lengths right of and below it,
+# with every place where none of the object is in the camera view equally
+# likely. Rather than trying random places until one misses the view, those
+# places are split into two strips (above and below the view, SPAWNCOLUMNS
+# wide) and the two sides of the view in between, and a single random
+# number picks one of them.
+SPAWNCOLUMNS = 3 * WINWIDTH + 1 # how many lefts an object can spawn at
+SPAWNROWS = 3 * WINHEIGHT + 1   # how many tops
+
+def getRandomOffCameraPositions(camerax, cameray, objWidths, objHeights, rng):
+    # A random place off camera (as above) for each of the arrays of widths
+    # and heights, using the NumPy random Generator rng. Returns an array of
+    # lefts and an array of tops.
+    aboveRows = numpy.maximum(WINHEIGHT - objHeights + 1, 0)
+    middleRows = SPAWNROWS - aboveRows - (WINHEIGHT + 1)
+    leftColumns = numpy.maximum(WINWIDTH - objWidths + 1, 0)
+    sideColumns = leftColumns + WINWIDTH + 1
+    stripPlaces = (SPAWNROWS - middleRows) * SPAWNCOLUMNS
+    place = rng.integers(0, stripPlaces + middleRows * sideColumns)
+    inStrips = place < stripPlaces
+    stripRow, stripColumn = numpy.divmod(place, SPAWNCOLUMNS)
+    sideRow, sideColumn = numpy.divmod(place - stripPlaces, sideColumns)
+    row = numpy.where(inStrips, stripRow + numpy.where(stripRow >= aboveRows, middleRows, 0),
+                      sideRow + aboveRows)
+    column = numpy.where(inStrips, stripColumn,
+                         sideColumn + numpy.where(sideColumn >= leftColumns, SPAWNCOLUMNS - sideColumns, 0))
+    return camerax - WINWIDTH + column, cameray - WINHEIGHT + row
+
+
+def makeNewGeese(count, camerax, cameray, rng, profile=DEFAULTPROFILE):
+    # count new geese off camera, using the NumPy random Generator rng.
+    # Returns a dict of arrays, one per goose key, for GooseStore.extend().
+    newGeese = makeNewGooseFields(count, rng, profile)
+    newGeese['x'], newGeese['y'] = getRandomOffCameraPositions(camerax, cameray, newGeese['width'], newGeese['height'], rng)
+    return newGeese
+
+
+def makeNewGooseFields(count, rng, profile=DEFAULTPROFILE):
+    # everything about count new geese except where they are, as arrays
+    generalSize = rng.integers(profile.gooseSize[0], profile.gooseSize[1] + 1, count)
+    multiplier = rng.integers(profile.gooseSizeMultiplier[0], profile.gooseSizeMultiplier[1] + 1, count)
+    return {'width': (generalSize + rng.integers(0, profile.gooseSizeSpread + 1, count)) * multiplier,
+            'height': (generalSize + rng.integers(0, profile.gooseSizeSpread + 1, count)) * multiplier,
+            'movex': getRandomVelocities(count, rng),
+            'movey': getRandomVelocities(count, rng),
+            'bounce': numpy.zeros(count, dtype=numpy.int64),
+            'bouncerate': rng.integers(GOOSEBOUNCERATE[0], GOOSEBOUNCERATE[1] + 1, count),
+            'bounceheight': rng.integers(GOOSEBOUNCEHEIGHT[0], GOOSEBOUNCEHEIGHT[1] + 1, count)}
+
+
+OBJECTCLASSES = {GRASS: Grass, POOP: Poop, TOOL: Tool} # used by World.takeObject()
+
+def getActiveArea(camerax, cameray):
+    # Returns the left, top, right and bottom edges of the active area:
+    # the camera view plus a window length beyond each edge of it.
+    return (camerax - WINWIDTH, cameray - WINHEIGHT,
+            camerax + (2 * WINWIDTH), cameray + (2 * WINHEIGHT))
+
+def removeOutsideChunks(objs, chunks, chunkSize):
+    # Removes every object whose top left corner isn't in one of the chunks
+    # in the set chunks from the list objs in one pass, sliding the kept
+    # objects down over the removed ones. Returns a list of the removed objects.
+    removed = []
+    kept = 0
+    for obj in objs:
+        if (obj.x // chunkSize, obj.y // chunkSize) in chunks:
+            objs[kept] = obj
+            kept += 1
+        else:
+            removed.append(obj)
+    del objs[kept:]
+    return removed
+
+def getChunks(chunkRange):
+    # every (chunkx, chunky) in a range from ChunkStore.getChunkRange(), in order
+    left, top, right, bottom = chunkRange
+    return [(chunkx, chunky) for chunky in range(top, bottom + 1) for chunkx in range(left, right + 1)]
+
+def getChunkOrder(chunk):
+    # sort key for chunks, in the order getChunks() lists them (row by row)
+    return (chunk[1], chunk[0])
+
+def getInChunkRanges(xs, ys, chunkRanges, chunkSize):
+    # a boolean array of which of the points (xs[i], ys[i]) are in the chunks of any of chunkRanges
+    inside = numpy.zeros(len(xs), dtype=bool)
+    for left, top, right, bottom in chunkRanges:
+        inside |= ((xs >= left * chunkSize) & (xs < (right + 1) * chunkSize) &
+                   (ys >= top * chunkSize) & (ys < (bottom + 1) * chunkSize))
+    return inside
+
+def getNatural(number):
+    # maps every integer to a different natural number (0, -1, 1, -2... to
+    # 0, 1, 2, 3...), for seeding a random number generator with
+    return number * 2 if number >= 0 else -number * 2 - 1
+
+
+if __name__ == '__main__':
+    # run the world without a window to see how fast it can go
+    import sys, time
+    ticks = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    world = World()
+    startTime = time.perf_counter()
+    for tick in range(ticks):
+        if world.done:
+            world = World()
+        world.step(random.choice((MOVELEFT, MOVERIGHT, MOVEUP, MOVEDOWN)))
+    elapsed = time.perf_counter() - startTime
+    print('%s ticks in %.2f seconds (%d ticks per second)' % (ticks, elapsed, ticks / elapsed))
@@ -0,0 +1,120 @@
+# GOOSE EAT GOOSE - pre-rendered background chunks
+# The grass never moves, so instead of filling the screen and blitting every
+# grass image every frame, the background is split into square chunks of the
+# game world that are each drawn once (grass color plus the grass on it) and
+# then blitted whole.
+
+import pygame
+from gooseworld import getActiveArea
+
+class GrassChunks:
+    # Chunk (chunkx, chunky) covers the world from (chunkx * chunkSize,
+    # chunky * chunkSize) to chunkSize pixels right and down from there.
+    #
+    # A chunk is only drawn when it first comes on screen, and is drawn
+    # again if the grass on it changes (the World counts grass changes in
+    # grassChanges, so the grass only has to be sorted into chunks again
+    # when that goes up). Chunks that leave the active area are dropped,
+    # just like the grass in them; that is checked whenever the camera
+    # moves into another chunk, whether or not the grass has changed.
+    #
+    # grassStep thins the grass out when there isn't time to draw it all:
+    # chunks are drawn with only every grassStep-th grass object on them.
+    # Chunks already drawn are kept as they are when it goes up, and drawn
+    # again (one a frame) when it comes back down.
+
+    def __init__(self, grassImages, color, chunkSize=256):
+        self.grassImages = grassImages
+        self.color = color
+        self.chunkSize = chunkSize
+        self.chunks = {}         # (chunkx, chunky) -> [grass ids drawn on it, Surface, grassChanges when last checked, grassStep it was drawn with]
+        self.grassByChunk = {}   # (chunkx, chunky) -> list of grass objects overlapping it
+        self.grassChanges = None # world.grassChanges when grassByChunk was worked out
+        self.cameraChunk = None  # the chunk the world's camera was in when far chunks were last dropped
+        self.rendered = 0        # how many times a chunk has been drawn
+        self.evicted = 0         # how many chunks have been dropped
+        self.grassStep = 1
+
+
+    def sortGrass(self, grassObjs):
+        # work out which chunks each grass object overlaps
+        chunkSize = self.chunkSize
+        grassByChunk = {}
+        for gObj in grassObjs:
+            left = gObj.x // chunkSize
+            top = gObj.y // chunkSize
+            right = (gObj.x + gObj.width - 1) // chunkSize
+            bottom = (gObj.y + gObj.height - 1) // chunkSize
+            for chunkx in range(left, right + 1):
+                for chunky in range(top, bottom + 1):
+                    chunk = grassByChunk.get((chunkx, chunky))
+                    if chunk is None:
+                        grassByChunk[(chunkx, chunky)] = [gObj]
+                    else:
+                        chunk.append(gObj)
+        self.grassByChunk = grassByChunk
+
+
+    def renderChunk(self, chunkx, chunky, grassObjs):
+        chunkSize = self.chunkSize
+        left = chunkx * chunkSize
+        top = chunky * chunkSize
+        surface = pygame.Surface((chunkSize, chunkSize))
+        if pygame.display.get_surface() is not None:
+            surface = surface.convert()
+        surface.fill(self.color)
+        grassStep = self.grassStep
+        for gObj in grassObjs:
+            if grassStep == 1 or gObj.id % grassStep == 0:
+                surface.blit(self.grassImages[gObj.grassImage], (gObj.x - left, gObj.y - top))
+        self.rendered += 1
+        return surface
+
+
+    def removeFarChunks(self, camerax, cameray):
+        # drop the chunks that are completely outside the active area
+        chunkSize = self.chunkSize
+        left, top, right, bottom = getActiveArea(camerax, cameray)
+        for chunkx, chunky in list(self.chunks):
+            if (chunkx * chunkSize >= right or (chunkx + 1) * chunkSize <= left or
+                chunky * chunkSize >= bottom or (chunky + 1) * chunkSize <= top):
+                del self.chunks[(chunkx, chunky)]
+                self.evicted += 1
+
+
+    def draw(self, surface, world, camerax, cameray, dirtyRects=None):
+        # Draw the background a camera at camerax, cameray can see onto surface.
+        chunkSize = self.chunkSize
+        if world.grassChanges != self.grassChanges:
+            self.sortGrass(world.grassObjs)
+            self.grassChanges = world.grassChanges
+        cameraChunk = (world.camerax // chunkSize, world.cameray // chunkSize)
+        if cameraChunk != self.cameraChunk:
+            self.removeFarChunks(world.camerax, world.cameray)
+            self.cameraChunk = cameraChunk
+
+        width, height = surface.get_size()
+        sprites = []
+        thinChunks = 0 # how many chunks on screen were drawn with less grass than there should be now
+        for chunkx in range(camerax // chunkSize, (camerax + width - 1) // chunkSize + 1):
+            for chunky in range(cameray // chunkSize, (cameray + height - 1) // chunkSize + 1):
+                chunk = self.chunks.get((chunkx, chunky))
+                if chunk is None or chunk[2] != self.grassChanges:
+                    # the grass changed since this chunk was drawn, but maybe not on this chunk
+                    grassObjs = self.grassByChunk.get((chunkx, chunky), ())
+                    grassIds = tuple([gObj.id for gObj in grassObjs])
+                    if chunk is None or chunk[0] != grassIds:
+                        chunk = [grassIds, self.renderChunk(chunkx, chunky, grassObjs), self.grassChanges, self.grassStep]
+                        self.chunks[(chunkx, chunky)] = chunk
+                    chunk[2] = self.grassChanges
+                elif chunk[3] > self.grassStep:
+                    thinChunks += 1
+                    if thinChunks == 1:
+                        chunk[1] = self.renderChunk(chunkx, chunky, self.grassByChunk.get((chunkx, chunky), ()))
+                        chunk[3] = self.grassStep
+                sprites.append((chunk[1], (chunkx * chunkSize - camerax, chunky * chunkSize - cameray)))
+        # blit them all in one call
+        rects = surface.blits(sprites)
+        if dirtyRects is not None:
+            for rect, sprite in zip(rects, sprites):
+                dirtyRects.add(rect, sprite[0])
@@ -0,0 +1,92 @@
+# GOOSE EAT GOOSE - adaptive level of detail
+# When frames take longer to draw than the frame rate allows, the game
+# doesn't drop ticks (they are always run), it just draws fewer frames and
+# stutters. The DetailController watches how long recent frames took and
+# steps the drawing down one detail level at a time while they are over
+# budget, and back up again once there is room to spare. Only the drawing
+# changes: the World is stepped exactly the same at every level, so
+# recordings and checksums don't depend on it.
+#
+# The levels, each on top of the ones before:
+#   0 full     - everything as normal
+#   1 bounce   - the geese are drawn without their bounce, and the World
+#                doesn't work it out for them (it still does for the few
+#                it checks for collisions, so the game plays the same)
+#   2 grass    - background chunks drawn from now on get half the grass
+#   3 sizes    - the other geese's images are scaled to the nearest
+#                SPRITESIZESTEP pixels, so geese share more of the cached
+#                images (the player is always drawn at its own size)
+
+from frameprofiler import RollingHistogram
+
+DETAILLEVELS = ('full', 'bounce', 'grass', 'sizes')
+DETAILFRAMES = 30    # how many recent frames the controller looks at
+DEGRADEAT = 1.0      # go down a level when the 90th percentile frame takes this much of the budget
+RESTOREAT = 0.5      # and back up when it takes under this much
+SETTLEFRAMES = 60    # frames to wait after changing level before changing again
+GRASSSTEP = 2        # from level 2, only every GRASSSTEP-th grass is drawn on new background chunks
+SPRITESIZESTEP = 8   # from level 3, goose images are scaled to multiples of this
+
+class DetailController:
+    # Call frame() with how long each frame's work took (in nanoseconds,
+    # not counting waiting for the next one). It returns True when the
+    # level has changed, and level is the one to draw the next frame at.
+    # budget is the longest a frame's work should take, in nanoseconds.
+    #
+    # With fixedLevel given, the level stays there (for comparing levels).
+
+    def __init__(self, budget, fixedLevel=None):
+        self.budget = budget
+        self.fixedLevel = fixedLevel
+        self.level = fixedLevel or 0
+        self.frameTimes = RollingHistogram(DETAILFRAMES)
+        self.settleFrames = DETAILFRAMES # frames until the level may change again
+        self.frames = 0
+        self.framesAtLevel = [0] * len(DETAILLEVELS)
+        self.degrades = [0] * len(DETAILLEVELS) # how many times each level was stepped down to
+        self.restores = [0] * len(DETAILLEVELS) # and up to
+
+
+    def frame(self, frameTime):
+        self.frames += 1
+        self.framesAtLevel[self.level] += 1
+        self.frameTimes.add(frameTime)
+        if self.fixedLevel is not None:
+            return False
+        if self.settleFrames:
+            self.settleFrames -= 1
+            return False
+
+        slowFrame = self.frameTimes.getPercentile(90)
+        if slowFrame > self.budget * DEGRADEAT and self.level < len(DETAILLEVELS) - 1:
+            self.level += 1
+            self.degrades[self.level] += 1
+        elif slowFrame < self.budget * RESTOREAT and self.level > 0:
+            self.level -= 1
+            self.restores[self.level] += 1
+        else:
+            # check again in a little while rather than every frame
+            self.settleFrames = DETAILFRAMES // 3
+            return False
+        # the frames from before the change don't say anything about the new level
+        self.frameTimes = RollingHistogram(DETAILFRAMES)
+        self.settleFrames = SETTLEFRAMES
+        return True
+
+
+    def stats(self):
+        # How many frames were drawn at each level and how many times each
+        # level was stepped down and up to, as a dict.
+        return {'level': DETAILLEVELS[self.level],
+                'frames': self.frames,
+                'framesAtLevel': dict(zip(DETAILLEVELS, self.framesAtLevel)),
+                'degrades': dict(zip(DETAILLEVELS[1:], self.degrades[1:])),
+                'restores': dict(zip(DETAILLEVELS[:-1], self.restores[:-1])),
+                'budgetMs': round(self.budget / 1e6, 3)}
+
+
+def getDetailLevel(name):
+    # the index in DETAILLEVELS of a level's name
+    if name not in DETAILLEVELS:
+        raise ValueError('unknown detail level %r (the levels are %s)' % (name, ', '.join(DETAILLEVELS)))
+    return DETAILLEVELS.index(name)
@@ -0,0 +1,33 @@
+# GOOSE EAT GOOSE - game variants
+# Every version of the game runs on the same engine (gooseworld.py) and
+# renderer (gooseeatgoose.py); a variant is just a Profile of settings.
+# Pick one with "python gooseeatgoose.py --variant NAME", or run one of the
+# launchers (squirrel.py and so on), which do that for their variant.
+
+from gooseworld import Profile
+
+SQUIRRELWINTEXT = ('You have achieved OMEGA SQUIRREL!', '(Press "r" to restart.)')
+
+# Squirrel Eat Squirrel (the game Goose Eat Goose is based on): smaller
+# squirrels, no pickups and no size limit once the player has won
+SQUIRREL = Profile(name='squirrel', caption='Squirrel Eat Squirrel', playerImage='squirrel.png',
+                   winText=SQUIRRELWINTEXT, startSize=25, winSize=300, maxSize=None,
+                   numGeese=30, pickups=(), gooseSize=(5, 25), gooseSizeSpread=10, gooseSizeMultiplier=(1, 3))
+
+PROFILES = {'goose': Profile(),
+            'squirrel': SQUIRREL,
+            # the group's annotated copies of squirrel.py; squirrelamy.py
+            # also played with a bigger start and the goose image, and
+            # shrank the player when a bigger squirrel hurt it
+            'squirrelamy': SQUIRREL.replace(name='squirrelamy', playerImage='gooseimg.png', startSize=30, winSize=350,
+                                            hitShrink=True),
+            'squirrelnash': SQUIRREL.replace(name='squirrelnash'),
+            'squirrelruk': SQUIRREL.replace(name='squirrelruk')}
+
+FALLBACKIMAGE = 'gooseimg.png' # used when a profile's player image isn't there (squirrel.png isn't in this repository)
+
+
+def getProfile(name):
+    if name not in PROFILES:
+        raise ValueError('unknown variant %r (the variants are %s)' % (name, ', '.join(PROFILES)))
+    return PROFILES[name]
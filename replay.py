@@ -0,0 +1,89 @@
+# GOOSE EAT GOOSE - input recording and replay
+# A World only depends on its seed and the inputs it is stepped with, so a
+# whole game can be saved as just those and played back exactly, e.g. to
+# compare two builds on the same game or to look at a slow frame again.
+#
+# Run "python replay.py FILE" to play a recording back without a window and
+# check that it ends up the same as when it was recorded.
+
+import sys, struct, time, zlib
+from gooseworld import World
+from profiles import getProfile
+
+MAGIC = b'GOOSEREPLAY2' # the start of every recording file
+OLDMAGIC = b'GOOSEREPLAY1' # recordings from before there were variants, which are all 'goose'
+
+class Recording:
+    # seed is the World's seed, inputs is a bytearray with the inputs for
+    # each tick (one byte of MOVE* flags per tick, in order), checksum is
+    # World.getChecksum() after the last tick, if it is known, and variant
+    # is the name of the game's profile.
+
+    def __init__(self, seed, inputs=b'', checksum=None, variant='goose'):
+        self.seed = seed
+        self.inputs = bytearray(inputs)
+        self.checksum = checksum
+        self.variant = variant
+
+
+    def record(self, inputs):
+        self.inputs.append(inputs)
+
+
+    def save(self, filename):
+        # The inputs are compressed: keys are held down for many ticks at a
+        # time, so long runs of the same byte squash very well.
+        checksum = (self.checksum or '').encode('ascii')
+        variant = self.variant.encode('ascii')
+        with open(filename, 'wb') as recordingFile:
+            recordingFile.write(MAGIC)
+            recordingFile.write(struct.pack('<QBB', self.seed, len(checksum), len(variant)))
+            recordingFile.write(checksum)
+            recordingFile.write(variant)
+            recordingFile.write(zlib.compress(bytes(self.inputs), 9))
+
+
+def loadRecording(filename):
+    with open(filename, 'rb') as recordingFile:
+        data = recordingFile.read()
+    if data.startswith(OLDMAGIC):
+        seed, checksumLength = struct.unpack_from('<QB', data, len(OLDMAGIC))
+        variantLength = 0
+        start = len(OLDMAGIC) + struct.calcsize('<QB')
+    elif data.startswith(MAGIC):
+        seed, checksumLength, variantLength = struct.unpack_from('<QBB', data, len(MAGIC))
+        start = len(MAGIC) + struct.calcsize('<QBB')
+    else:
+        raise ValueError('%s is not a goose recording' % filename)
+    checksum = data[start:start + checksumLength].decode('ascii') or None
+    start += checksumLength
+    variant = data[start:start + variantLength].decode('ascii') or 'goose'
+    return Recording(seed, zlib.decompress(data[start + variantLength:]), checksum, variant)
+
+
+def replay(recording, makeSurface=None):
+    # Make a new World from the recording's seed and variant and step it
+    # through all the recorded inputs. Returns the world.
+    world = World(makeSurface=makeSurface, seed=recording.seed, profile=getProfile(recording.variant))
+    for inputs in recording.inputs:
+        world.step(inputs)
+    return world
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 2:
+        print('usage: python replay.py FILE')
+        sys.exit(2)
+    recording = loadRecording(sys.argv[1])
+    startTime = time.perf_counter()
+    world = replay(recording)
+    elapsed = time.perf_counter() - startTime
+    print('replayed %s ticks in %.2f seconds' % (len(recording.inputs), elapsed))
+    checksum = world.getChecksum()
+    if recording.checksum is None:
+        print('checksum %s (the recording has none to compare with)' % checksum)
+    elif checksum == recording.checksum:
+        print('checksum %s matches the recording' % checksum)
+    else:
+        print('checksum %s does NOT match the recording (%s)' % (checksum, recording.checksum))
+        sys.exit(1)
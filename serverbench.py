@@ -0,0 +1,158 @@
+# GOOSE EAT GOOSE - multiplayer server benchmark
+# Runs a GooseServer in this process and simulated players in another one
+# (so that they don't take the server's CPU time), for a range of player
+# counts, and prints the server's tick latency and the bandwidth each
+# player gets as JSON.
+#
+# Usage: python serverbench.py [--clients 2,16,64] [--per-session 2] [--ticks 300]
+#                              [--variant goose] [--tcp] [--output FILE]
+#
+# Each simulated player joins session (player number // per-session), holds
+# down a random arrow key for a second at a time and reads (and parses)
+# every snapshot. For each run the report has the server's tick work and
+# tick latency percentiles (from when a tick was due to the last snapshot
+# being sent, in milliseconds), how many ticks started late, the bytes per
+# second each player was sent, and how evenly the snapshots arrived.
+
+import os, sys, json, time, random, asyncio, argparse, platform, tempfile
+import multiprocessing
+import numpy
+
+from gooseworld import FPS, MOVELEFT, MOVERIGHT, MOVEUP, MOVEDOWN
+from gooseserver import GooseServer, SnapshotReader, openConnection, parseSnapshot, getAddress, DEFAULTPORT
+from profiles import PROFILES
+
+DEFAULTCLIENTS = (2, 16, 64)
+PERCENTILES = (50, 95, 99)
+MOVES = (MOVELEFT, MOVERIGHT, MOVEUP, MOVEDOWN)
+KEYHOLDTICKS = 30 # how many ticks each simulated player holds a key for
+CONNECTTIMEOUT = 10.0 # seconds to wait for all the simulated players to join
+
+
+def getPercentiles(times):
+    # nanoseconds in, milliseconds out
+    if not len(times):
+        return {}
+    values = numpy.percentile(numpy.asarray(times, dtype=numpy.float64) / 1e6, PERCENTILES)
+    return dict(('p%d' % percentile, round(float(value), 4)) for percentile, value in zip(PERCENTILES, values))
+
+
+async def simulateClient(address, sessionNumber, seed):
+    # One simulated player, until the server disconnects it. Returns when
+    # (perf_counter_ns) each snapshot arrived and how long parsing took.
+    reader, writer = await openConnection(address, sessionNumber)
+    keys = random.Random(seed)
+
+    async def pressKeys():
+        while True:
+            writer.write(bytes((keys.choice(MOVES),)))
+            await asyncio.sleep(KEYHOLDTICKS / FPS)
+    pressing = asyncio.create_task(pressKeys())
+
+    snapshotReader = SnapshotReader()
+    perf = time.perf_counter_ns
+    arrivals = []
+    parseTime = 0
+    received = 0
+    try:
+        while True:
+            data = await reader.read(65536)
+            if not data:
+                break
+            now = perf()
+            received += len(data)
+            for payload in snapshotReader.feed(data):
+                parseSnapshot(payload)
+                arrivals.append(now)
+            parseTime += perf() - now
+    except ConnectionError:
+        pass
+    finally:
+        pressing.cancel()
+        writer.close()
+    return {'arrivals': arrivals, 'parseTime': parseTime, 'received': received}
+
+
+def runClients(address, numClients, perSession, seed, connection):
+    # the simulated players' process: sends their results back over connection
+    async def simulate():
+        return await asyncio.gather(*[simulateClient(address, i // perSession, seed + i) for i in range(numClients)])
+    connection.send(asyncio.run(simulate()))
+    connection.close()
+
+
+async def benchmarkServer(profile, numClients, perSession, ticks, warmupTicks, seed, address):
+    host, port, path = getAddress(address)
+    server = GooseServer(profile, seed, maxSeats=perSession, statsTicks=ticks)
+    await server.listen(port, host, path)
+
+    connection, clientConnection = multiprocessing.Pipe(duplex=False)
+    process = multiprocessing.get_context('spawn').Process(target=runClients, args=(address, numClients, perSession, seed, clientConnection))
+    process.start()
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + CONNECTTIMEOUT
+    while len(server.clients) < numClients:
+        if loop.time() > deadline:
+            raise RuntimeError('only %d of %d simulated players joined' % (len(server.clients), numClients))
+        await asyncio.sleep(0.01)
+
+    await server.run(warmupTicks)
+    server.resetStats()
+    startTime = time.perf_counter()
+    await server.run(ticks)
+    seconds = time.perf_counter() - startTime # not ticks / FPS, which late ticks would make too short
+    bytesPerSecond = numpy.array([client.bytesSent / seconds for client in server.clients])
+    report = server.stats()
+    await server.close()
+    results = await loop.run_in_executor(None, connection.recv)
+    process.join()
+
+    intervals = numpy.concatenate([numpy.diff(result['arrivals']) for result in results])
+    snapshots = sum(len(result['arrivals']) for result in results)
+    report.update({'bytesPerClientPerSecond': {'mean': round(float(bytesPerSecond.mean()), 1),
+                                               'max': round(float(bytesPerSecond.max()), 1)},
+                   'snapshotBytes': round(report['bytesSent'] / max(1, report['snapshotsSent']), 1),
+                   'arrivalIntervalMs': getPercentiles(intervals),
+                   'parseMs': round(sum(result['parseTime'] for result in results) / 1e6 / max(1, snapshots), 4)})
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Tick latency and bandwidth benchmark for the multiplayer server.')
+    parser.add_argument('--clients', default=','.join(map(str, DEFAULTCLIENTS)), help='comma separated player counts to sweep')
+    parser.add_argument('--per-session', type=int, default=2, help='players in each session')
+    parser.add_argument('--ticks', type=int, default=300, help='ticks to time for each run')
+    parser.add_argument('--warmup', type=int, default=30, help='ticks to run before timing')
+    parser.add_argument('--variant', default='goose', help='the game to serve: ' + ', '.join(PROFILES))
+    parser.add_argument('--seed', type=int, default=1, help='random seed for the sessions and the simulated players')
+    parser.add_argument('--tcp', action='store_true', help='connect over TCP on 127.0.0.1 instead of a Unix socket')
+    parser.add_argument('--output', help='write the JSON report here instead of to stdout')
+    args = parser.parse_args()
+    if args.variant not in PROFILES:
+        parser.error('unknown variant %r' % args.variant)
+
+    runs = []
+    with tempfile.TemporaryDirectory() as directory:
+        address = str(DEFAULTPORT) if args.tcp else os.path.join(directory, 'goose.sock')
+        for numClients in map(int, args.clients.split(',')):
+            print('running %d players, %d per session' % (numClients, args.per_session), file=sys.stderr)
+            run = {'variant': args.variant, 'seed': args.seed, 'ticks': args.ticks,
+                   'transport': 'tcp' if args.tcp else 'unix', 'players': numClients, 'perSession': args.per_session}
+            run.update(asyncio.run(benchmarkServer(PROFILES[args.variant], numClients, args.per_session,
+                                                   args.ticks, args.warmup, args.seed, address)))
+            runs.append(run)
+
+    report = {'python': platform.python_version(),
+              'numpy': numpy.__version__,
+              'platform': platform.platform(),
+              'runs': runs}
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as outputFile:
+            outputFile.write(text + '\n')
+    else:
+        print(text)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,238 @@
+# GOOSE EAT GOOSE - many headless games at once
+# A SessionHost runs game sessions in a pool of worker processes, for soak
+# tests and balance sweeps. A session is one headless World per game (no
+# window, fonts or images, so nothing is shared between sessions) played
+# for a number of ticks by scripted inputs, starting a new game whenever one
+# finishes. Each worker runs one session at a time and is sent the next one
+# as soon as it is done, and each session's result comes back over the
+# worker's pipe as soon as it finishes, so sessions of different lengths
+# keep every worker busy.
+#
+# Usage: python sessionhost.py [--sessions 32] [--workers N] [--ticks 3000]
+#                              [--variants goose,squirrel,...] [--seed 1]
+#                              [--set numGeese=100 ...] [--output FILE]
+#
+# Prints one line of JSON per session as they finish (in the order they
+# finish), then a summary on stderr. The sessions' seeds all come from
+# --seed, so the same command plays the same games, with any number of
+# workers.
+
+import os
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1') # keep pygame's banner out of the results on stdout
+
+import sys, json, time, random, argparse, traceback
+import multiprocessing
+from multiprocessing.connection import wait
+
+from gooseworld import World, MOVELEFT, MOVERIGHT, MOVEUP, MOVEDOWN
+from profiles import PROFILES, getProfile
+
+MOVES = (MOVELEFT, MOVERIGHT, MOVEUP, MOVEDOWN, MOVELEFT | MOVEUP, MOVELEFT | MOVEDOWN,
+         MOVERIGHT | MOVEUP, MOVERIGHT | MOVEDOWN)
+KEYHOLDTICKS = 30 # how many ticks the scripted inputs hold each move for
+DEFAULTSESSIONS = 32
+DEFAULTTICKS = 3000
+
+
+def makeSessionConfig(sessionId, variant='goose', seed=None, ticks=DEFAULTTICKS, settings=None):
+    # A session's config, as a plain dict so that it pickles small. settings
+    # are Profile settings to change from the variant's (e.g. numGeese).
+    if seed is None:
+        seed = random.randrange(2**32)
+    return {'sessionId': sessionId, 'variant': variant, 'seed': seed, 'ticks': ticks, 'settings': dict(settings or {})}
+
+
+def makeSessionConfigs(numSessions, variants, seed, ticks, settings=None):
+    # numSessions configs, taking turns at the variants, each with its own seed from seed
+    seeds = random.Random(seed)
+    return [makeSessionConfig(sessionId, variants[sessionId % len(variants)], seeds.randrange(2**32), ticks, settings)
+            for sessionId in range(numSessions)]
+
+
+def runSession(config):
+    # Plays one session in this process and returns its result as a dict.
+    profile = getProfile(config['variant'])
+    if config['settings']:
+        profile = profile.replace(**config['settings'])
+    worldSeeds = random.Random(config['seed'])
+    keys = random.Random(worldSeeds.randrange(2**32))
+    world = World(seed=worldSeeds.randrange(2**32), profile=profile)
+    games = wins = gameOvers = 0
+    sizes = []
+    move = 0
+    startTime = time.perf_counter()
+    startCPU = time.process_time()
+    for tick in range(config['ticks']):
+        if tick % KEYHOLDTICKS == 0:
+            move = keys.choice(MOVES)
+        world.step(move)
+        # A variant with no maxSize waits for "r" to be pressed once the
+        # player has won, which the scripted inputs do straight away.
+        if world.done or (world.winMode and profile.maxSize is None):
+            games += 1
+            wins += world.winMode
+            gameOvers += world.gameOverMode
+            sizes.append(world.playerObj.size)
+            world = World(seed=worldSeeds.randrange(2**32), profile=profile)
+
+    seconds = time.perf_counter() - startTime
+    result = dict(config)
+    result.update({'games': games,
+                   'wins': wins,
+                   'gameOvers': gameOvers,
+                   'meanFinalSize': round(sum(sizes) / len(sizes), 1) if sizes else None,
+                   'checksum': world.getChecksum(), # of the game that was going at the end
+                   'seconds': round(seconds, 4),
+                   'cpuSeconds': round(time.process_time() - startCPU, 4),
+                   'ticksPerSecond': round(config['ticks'] / seconds, 1) if seconds else 0.0,
+                   'worker': os.getpid()})
+    return result
+
+
+def runWorker(connection):
+    # A worker process: runs each config it is sent and sends its result
+    # back, until it is sent None. A session that raises an exception
+    # sends back its config with the traceback under 'error' instead, and
+    # the worker carries on with the next one.
+    while True:
+        config = connection.recv()
+        if config is None:
+            break
+        try:
+            result = runSession(config)
+        except Exception:
+            result = dict(config)
+            result['error'] = traceback.format_exc()
+        connection.send(result)
+    connection.close()
+
+
+class SessionHost:
+    # A pool of worker processes. run() a list of session configs through it
+    # and close() it when done (or use it in a with statement).
+
+    def __init__(self, numWorkers=None):
+        if numWorkers is None:
+            numWorkers = os.cpu_count() or 1
+        # spawned rather than forked, so a worker doesn't start off with a
+        # copy of whatever the host has loaded (pygame's state included)
+        context = multiprocessing.get_context('spawn')
+        self.connections = []
+        self.processes = []
+        for i in range(numWorkers):
+            connection, workerConnection = context.Pipe()
+            process = context.Process(target=runWorker, args=(workerConnection,), daemon=True)
+            process.start()
+            workerConnection.close()
+            self.connections.append(connection)
+            self.processes.append(process)
+        self.sessionsRun = 0
+        self.errors = 0
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, *exception):
+        self.close()
+
+
+    def run(self, configs):
+        # A generator of the sessions' results, each as soon as it finishes.
+        # Every worker is given a session to start with, then the next one
+        # as soon as it sends a result back.
+        pending = list(reversed(configs))
+        busy = set()
+        for connection in self.connections:
+            if not pending:
+                break
+            connection.send(pending.pop())
+            busy.add(connection)
+        while busy:
+            for connection in wait(list(busy)):
+                try:
+                    result = connection.recv()
+                except EOFError:
+                    raise RuntimeError('a session worker stopped unexpectedly')
+                self.sessionsRun += 1
+                self.errors += 'error' in result
+                if pending:
+                    connection.send(pending.pop())
+                else:
+                    busy.discard(connection)
+                yield result
+
+
+    def close(self):
+        for connection in self.connections:
+            try:
+                connection.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+            connection.close()
+        for process in self.processes:
+            process.join()
+        self.connections = []
+        self.processes = []
+
+
+def getSettings(assignments):
+    # ['numGeese=100', ...] -> {'numGeese': 100, ...}, for Profile.replace()
+    settings = {}
+    for assignment in assignments:
+        name, equals, value = assignment.partition('=')
+        if not equals:
+            raise ValueError('%r should be NAME=VALUE' % assignment)
+        try:
+            settings[name] = json.loads(value)
+        except ValueError:
+            settings[name] = value
+    return settings
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Runs many headless goose game sessions in worker processes.')
+    parser.add_argument('--sessions', type=int, default=DEFAULTSESSIONS, help='how many sessions to run')
+    parser.add_argument('--workers', type=int, help='worker processes (default: one per CPU)')
+    parser.add_argument('--ticks', type=int, default=DEFAULTTICKS, help='ticks to play in each session')
+    parser.add_argument('--variants', default='goose', help='comma separated variants to take turns at: ' + ', '.join(PROFILES))
+    parser.add_argument('--seed', type=int, default=1, help='random seed for the sessions')
+    parser.add_argument('--set', action='append', default=[], metavar='NAME=VALUE',
+                        help='change a profile setting in every session, e.g. numGeese=100')
+    parser.add_argument('--output', help='write the results here instead of to stdout')
+    args = parser.parse_args()
+    variants = args.variants.split(',')
+    for variant in variants:
+        if variant not in PROFILES:
+            parser.error('unknown variant %r' % variant)
+    try:
+        settings = getSettings(args.set)
+    except ValueError as error:
+        parser.error(str(error))
+
+    configs = makeSessionConfigs(args.sessions, variants, args.seed, args.ticks, settings)
+    outputFile = open(args.output, 'w') if args.output else sys.stdout
+    startTime = time.perf_counter()
+    sessionCPUSeconds = 0.0
+    with SessionHost(args.workers) as host:
+        for result in host.run(configs):
+            sessionCPUSeconds += result.get('cpuSeconds', 0.0)
+            outputFile.write(json.dumps(result) + '\n')
+            outputFile.flush()
+        numWorkers = len(host.processes)
+        errors = host.errors
+    if outputFile is not sys.stdout:
+        outputFile.close()
+
+    # The CPU time the sessions took over the time it all took is how many
+    # CPUs were kept busy, which should come out close to the number of
+    # workers (as long as there are that many CPUs).
+    seconds = time.perf_counter() - startTime
+    print('%d sessions of %d ticks on %d workers in %.2f seconds (%d ticks per second, %.2f CPUs busy on average, %d errors)'
+          % (len(configs), args.ticks, numWorkers, seconds, len(configs) * args.ticks / seconds, sessionCPUSeconds / seconds, errors),
+          file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
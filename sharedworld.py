@@ -0,0 +1,130 @@
+# GOOSE EAT GOOSE - one world, several players
+# A SharedWorld is a World with a seat for each player in it. The geese,
+# grass, poop and tools are shared, and each seat has its own goose, its own
+# camera and its own game (invulnerability, game over and winning).
+#
+# The World's methods all work on self.playerObj, self.camerax and the
+# other per-player attributes, so step() loads each seat's copies of them
+# into the World in turn, runs the same code a one-player World runs, and
+# saves them back.
+
+import hashlib
+from gooseworld import *
+
+# the World attributes that each seat has its own copy of
+SEATSTATE = ('playerObj', 'camerax', 'cameray', 'prevCamerax', 'prevCameray', 'prevPlayerPos',
+             'invulnerableMode', 'invulnerableTicks', 'gameOverMode', 'gameOverTicks', 'winMode', 'done')
+SPAWNSPREAD = WINWIDTH # new players start this far apart from each other at most
+
+class Seat:
+    # One player in a SharedWorld. seatId stays the same for as long as the
+    # player is in the world, through any number of games.
+    __slots__ = ('seatId', 'games') + SEATSTATE
+
+    def __init__(self, seatId):
+        self.seatId = seatId
+        self.games = 0 # how many games this seat has finished
+
+
+class SharedWorld(World):
+    # addSeat() when a player joins and removeSeat() when they leave, and
+    # step() with a dict of seatId -> inputs (a seat with no inputs in the
+    # dict stands still). When a seat's game is done, the seat starts again
+    # with a new goose in the same world; the world itself never ends.
+
+    def __init__(self, seed=None, profiler=NOPROFILER, profile=DEFAULTPROFILE):
+        self.seats = {} # seatId -> Seat, in the order they joined
+        self.nextSeatId = 0
+        World.__init__(self, seed=seed, profiler=profiler, profile=profile)
+
+
+    def addSeat(self):
+        # Returns the new Seat. Its goose starts somewhere near the middle of
+        # the world, invulnerable for a moment in case it lands by a big goose.
+        seat = Seat(self.nextSeatId)
+        self.nextSeatId += 1
+        self.startSeat(seat)
+        self.seats[seat.seatId] = seat
+        return seat
+
+
+    def removeSeat(self, seatId):
+        del self.seats[seatId]
+
+
+    def startSeat(self, seat):
+        size = self.profile.startSize
+        playerObj = Player(HALF_WINWIDTH + self.random.randint(-SPAWNSPREAD, SPAWNSPREAD),
+                           HALF_WINHEIGHT + self.random.randint(-SPAWNSPREAD, SPAWNSPREAD), size)
+        seat.playerObj = playerObj
+        seat.camerax = seat.prevCamerax = playerObj.x + int(size / 2) - HALF_WINWIDTH
+        seat.cameray = seat.prevCameray = playerObj.y + int(size / 2) - HALF_WINHEIGHT
+        seat.prevPlayerPos = playerObj.rect.topleft
+        seat.invulnerableMode = True
+        seat.invulnerableTicks = INVULNTIME * FPS
+        seat.gameOverMode = False
+        seat.gameOverTicks = 0
+        seat.winMode = False
+        seat.done = False
+
+
+    def loadSeat(self, seat):
+        for name in SEATSTATE:
+            setattr(self, name, getattr(seat, name))
+
+
+    def saveSeat(self, seat):
+        for name in SEATSTATE:
+            setattr(seat, name, getattr(self, name))
+
+
+    def step(self, inputs=None):
+        # Advance the game by one tick, in the same order World.step() does
+        # for one player. inputs is a dict of seatId -> MOVE flags.
+        if inputs is None:
+            inputs = {}
+        self.tickCount += 1
+        mark = self.profiler.mark
+        seats = list(self.seats.values())
+        for seat in seats:
+            seat.prevCamerax = seat.camerax
+            seat.prevCameray = seat.cameray
+            seat.prevPlayerPos = seat.playerObj.rect.topleft
+            self.loadSeat(seat)
+            self.updateTimers()
+            self.saveSeat(seat)
+        self.moveGeese()
+        mark('goose moves')
+        self.updateChunks()
+        mark('chunks')
+        for seat in seats:
+            self.loadSeat(seat)
+            self.updateCamera()
+            if not self.gameOverMode:
+                self.movePlayer(inputs.get(seat.seatId, 0))
+                self.checkCollisions()
+            self.saveSeat(seat)
+            if seat.done:
+                seat.games += 1
+                self.startSeat(seat)
+        mark('collisions')
+
+
+    def getChunkRanges(self):
+        # the chunks around every seat's camera (or the World's own, before anyone has joined)
+        if not self.seats:
+            return World.getChunkRanges(self)
+        getChunkRange = self.chunks.getChunkRange
+        return tuple(sorted(set(getChunkRange(*getActiveArea(seat.camerax, seat.cameray)) for seat in self.seats.values())))
+
+
+    def getChecksum(self):
+        checksum = World.getChecksum(self)
+        for seat in self.seats.values():
+            playerObj = seat.playerObj
+            checksum += repr((seat.seatId, seat.games, seat.camerax, seat.cameray,
+                              seat.invulnerableMode, seat.invulnerableTicks,
+                              seat.gameOverMode, seat.gameOverTicks, seat.winMode,
+                              playerObj.x, playerObj.y, playerObj.size, playerObj.facing,
+                              playerObj.bounce, playerObj.health))
+        return hashlib.sha1(checksum.encode()).hexdigest()
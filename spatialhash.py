@@ -0,0 +1,89 @@
+# GOOSE EAT GOOSE - spatial hash
+# Splits the game world into a uniform grid of square cells and remembers
+# which objects are in which cell, so that "what is near this rect?" only
+# has to look at a few cells instead of every object in the world.
+
+class SpatialHash:
+    # Objects are identified by keys, which can be anything hashable (the
+    # World uses tuples like ('goose', 12) and ('poop', 40)).
+    #
+    # Each key lives in just the one cell its top left corner is in, which
+    # keeps moving an object cheap: it only has to be rehashed when that
+    # corner crosses into another cell. To make up for it, query() also
+    # looks far enough up and to the left to catch the biggest object that
+    # has been inserted.
+
+    def __init__(self, cellSize):
+        self.cellSize = cellSize
+        self.cells = {}     # (cellx, celly) -> set of keys in that cell
+        self.keyCells = {}  # key -> the cell it is in
+        self.maxWidth = 0   # the biggest width and height inserted so far
+        self.maxHeight = 0
+
+
+    def getCell(self, left, top):
+        return (left // self.cellSize, top // self.cellSize)
+
+
+    def insert(self, key, cell, width, height):
+        # Add a key whose top left corner is in cell and whose area is at
+        # most width x height.
+        self.keyCells[key] = cell
+        bucket = self.cells.get(cell)
+        if bucket is None:
+            self.cells[cell] = {key}
+        else:
+            bucket.add(key)
+        if width > self.maxWidth:
+            self.maxWidth = width
+        if height > self.maxHeight:
+            self.maxHeight = height
+
+
+    def remove(self, key):
+        cell = self.keyCells.pop(key)
+        bucket = self.cells[cell]
+        bucket.discard(key)
+        if not bucket:
+            del self.cells[cell] # don't keep empty cells around
+
+
+    def move(self, key, cell):
+        # Move a key to another cell (its size must not have grown).
+        oldCell = self.keyCells[key]
+        if oldCell == cell:
+            return
+        bucket = self.cells[oldCell]
+        bucket.discard(key)
+        if not bucket:
+            del self.cells[oldCell]
+        self.keyCells[key] = cell
+        bucket = self.cells.get(cell)
+        if bucket is None:
+            self.cells[cell] = {key}
+        else:
+            bucket.add(key)
+
+
+    def query(self, left, top, width, height):
+        # Returns the set of keys that might overlap this area. They are
+        # only candidates: the caller still has to check for a real overlap.
+        found = set()
+        cells = self.cells
+        cellSize = self.cellSize
+        # an object starting up to maxWidth - 1 pixels to the left (or
+        # maxHeight - 1 pixels above) can still reach into the area
+        cellLeft = (left - self.maxWidth + 1) // cellSize
+        cellTop = (top - self.maxHeight + 1) // cellSize
+        cellRight = (left + width - 1) // cellSize
+        cellBottom = (top + height - 1) // cellSize
+        for cellx in range(cellLeft, cellRight + 1):
+            for celly in range(cellTop, cellBottom + 1):
+                bucket = cells.get((cellx, celly))
+                if bucket:
+                    found.update(bucket)
+        return found
+
+
+    def __len__(self):
+        return len(self.keyCells)
@@ -0,0 +1,79 @@
+# GOOSE EAT GOOSE - scaled sprite cache
+# Keeps the scaled copies of the goose image around so that geese (and the
+# player) of the same size and facing share one surface instead of calling
+# pygame.transform.scale() every time one is needed.
+
+import collections, pygame
+
+class SpriteCache:
+    # images maps a facing (LEFT or RIGHT) to the full-size image to scale.
+    # maxBytes caps how much pixel memory the cached surfaces may use. When
+    # a new surface would go over it, the least recently used ones are
+    # dropped. The geese don't keep their images (they are looked up here
+    # each time one is drawn), so a dropped surface is freed and this is all
+    # the memory the goose images take, apart from the player's and a
+    # surface too big to cache, which is only kept while it is being drawn.
+    #
+    # With sizeStep over 1, the sizes of the images asked for with rounded
+    # are rounded to the nearest multiple of it, so that geese of nearly the
+    # same size share an image instead of each getting one scaled exactly.
+
+    def __init__(self, images, maxBytes):
+        self.images = images
+        self.maxBytes = maxBytes
+        self.surfaces = collections.OrderedDict() # (facing, width, height) -> Surface, oldest first
+        self.usedBytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.sizeStep = 1
+
+
+    def get(self, facing, width, height, rounded=False):
+        # Return the image for this facing scaled to width x height.
+        sizeStep = self.sizeStep
+        if rounded and sizeStep > 1:
+            width = max(sizeStep, (width + sizeStep // 2) // sizeStep * sizeStep)
+            height = max(sizeStep, (height + sizeStep // 2) // sizeStep * sizeStep)
+        key = (facing, width, height)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.hits += 1
+            self.surfaces.move_to_end(key)
+            return surface
+
+        self.misses += 1
+        surface = pygame.transform.scale(self.images[facing], (width, height))
+        size = getSurfaceBytes(surface)
+        if size > self.maxBytes:
+            # too big to cache at all, so don't drop anything for it
+            return surface
+        while self.surfaces and self.usedBytes + size > self.maxBytes:
+            oldKey, oldSurface = self.surfaces.popitem(last=False)
+            self.usedBytes -= getSurfaceBytes(oldSurface)
+            self.evictions += 1
+        self.surfaces[key] = surface
+        self.usedBytes += size
+        return surface
+
+
+    def clear(self):
+        self.surfaces.clear()
+        self.usedBytes = 0
+
+
+    def stats(self):
+        # Returns the counters as a dict, for sizing maxBytes.
+        lookups = self.hits + self.misses
+        return {'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hitRate': self.hits / lookups if lookups else 0.0,
+                'surfaces': len(self.surfaces),
+                'usedBytes': self.usedBytes,
+                'maxBytes': self.maxBytes}
+
+
+def getSurfaceBytes(surface):
+    # how much pixel memory a surface takes up
+    return surface.get_pitch() * surface.get_height()
@@ -0,0 +1,100 @@
+# GOOSE EAT GOOSE - persistent world chunks
+# The game world is split into square chunks. What starts off in a chunk
+# (its grass, poop, tools and geese) only depends on the World's seed and
+# the chunk's coordinates, so it is the same every time the chunk is made.
+# Chunks near the camera are loaded into the World as ordinary objects;
+# when the camera moves away they are packed back into small arrays here, so
+# coming back finds everything as it was left.
+
+import numpy
+
+WORLDCHUNKSIZE = 512 # width and height of a world chunk, in pixels
+
+# the columns of each array in a ChunkRecord (x and y are relative to the
+# top left of the chunk, so everything fits in 16 bits)
+GRASSCOLUMNS = ('x', 'y', 'grassImage')
+PICKUPCOLUMNS = ('x', 'y')
+GOOSECOLUMNS = ('x', 'y', 'movex', 'movey', 'width', 'height', 'bounce', 'bouncerate', 'bounceheight')
+RECORDTYPE = numpy.int16
+
+class ChunkRecord:
+    # The contents of one chunk while it isn't loaded: an array each for
+    # its grass, poop, tools and geese, one row per object.
+    __slots__ = ('grass', 'poop', 'tool', 'geese')
+
+    def __init__(self, grass, poop, tool, geese):
+        self.grass = numpy.asarray(grass, dtype=RECORDTYPE).reshape(-1, len(GRASSCOLUMNS))
+        self.poop = numpy.asarray(poop, dtype=RECORDTYPE).reshape(-1, len(PICKUPCOLUMNS))
+        self.tool = numpy.asarray(tool, dtype=RECORDTYPE).reshape(-1, len(PICKUPCOLUMNS))
+        self.geese = numpy.asarray(geese, dtype=RECORDTYPE).reshape(-1, len(GOOSECOLUMNS))
+
+
+    def getBytes(self):
+        return self.grass.nbytes + self.poop.nbytes + self.tool.nbytes + self.geese.nbytes
+
+
+class ChunkStore:
+    # Keeps the records of the chunks that aren't loaded. generate is a
+    # function (chunkx, chunky) -> ChunkRecord that makes a chunk that has
+    # never been seen before.
+    #
+    # take() a chunk's record to load it and put() one back to unload it.
+    # Geese wander, so a goose that walks off the loaded chunks is added to
+    # whichever chunk it is in with addGeese(), even if that chunk has never
+    # been loaded.
+
+    def __init__(self, generate, chunkSize=WORLDCHUNKSIZE):
+        self.generate = generate
+        self.chunkSize = chunkSize
+        self.records = {}   # (chunkx, chunky) -> ChunkRecord of a chunk that isn't loaded
+        self.loaded = set() # the chunks that are loaded into the World
+        self.generated = 0  # how many chunks have been made from scratch
+        self.loads = 0
+        self.unloads = 0
+
+
+    def getChunkRange(self, left, top, right, bottom):
+        # Returns the first and last chunkx and chunky of the chunks that
+        # overlap this area of the world.
+        chunkSize = self.chunkSize
+        return (left // chunkSize, top // chunkSize, (right - 1) // chunkSize, (bottom - 1) // chunkSize)
+
+
+    def getRecord(self, chunk):
+        # the stored record of a chunk that isn't loaded, made if it has to be
+        record = self.records.get(chunk)
+        if record is None:
+            record = self.records[chunk] = self.generate(*chunk)
+            self.generated += 1
+        return record
+
+
+    def take(self, chunk):
+        record = self.getRecord(chunk)
+        del self.records[chunk]
+        self.loaded.add(chunk)
+        self.loads += 1
+        return record
+
+
+    def put(self, chunk, record):
+        self.records[chunk] = record
+        self.loaded.discard(chunk)
+        self.unloads += 1
+
+
+    def addGeese(self, chunk, geese):
+        # add rows of geese (in GOOSECOLUMNS order, relative to the chunk)
+        # to a chunk that isn't loaded
+        record = self.getRecord(chunk)
+        record.geese = numpy.concatenate((record.geese, numpy.asarray(geese, dtype=RECORDTYPE)))
+
+
+    def stats(self):
+        # Returns how many chunks there are and how much memory the unloaded ones take, as a dict.
+        return {'loaded': len(self.loaded),
+                'stored': len(self.records),
+                'storedBytes': sum(record.getBytes() for record in self.records.values()),
+                'generated': self.generated,
+                'loads': self.loads,
+                'unloads': self.unloads}